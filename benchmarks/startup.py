@@ -0,0 +1,75 @@
+"""
+Cold start cost of the v2 client: import time, memory and loaded modules.
+
+Every run happens in a fresh interpreter, as in a serverless notification
+handler. Run from the repository root:
+
+    python benchmarks/startup.py --runs 20
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# executed in the child interpreter, prints one JSON line
+CHILD = r'''
+import json, sys, time, tracemalloc
+baseline = set(sys.modules)
+if {trace}:
+    tracemalloc.start()
+start = time.perf_counter()
+from office365_api.v2.client import MicrosoftGraphClient
+imported = time.perf_counter()
+client = MicrosoftGraphClient(None)
+client.users('someone@example.com')
+created = time.perf_counter()
+result = {{
+    'import_ms': (imported - start) * 1000,
+    'client_ms': (created - imported) * 1000,
+    'modules': len(set(sys.modules) - baseline),
+    'requests_loaded': 'requests' in sys.modules,
+}}
+if {trace}:
+    result['peak_kb'] = tracemalloc.get_traced_memory()[1] / 1024
+print(json.dumps(result))
+'''
+
+
+def run_child(trace):
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    out = subprocess.run([sys.executable, '-c', CHILD.format(trace=trace)], env=env, check=True,
+                         capture_output=True, text=True).stdout
+    return json.loads(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--json', action='store_true', help='print the summary as JSON')
+    args = parser.parse_args(argv)
+
+    timings = [run_child(trace=False) for _ in range(args.runs)]
+    # allocations are traced in a separate run, tracing slows the imports down
+    memory = run_child(trace=True)
+    summary = {
+        'runs': args.runs,
+        'import_ms_median': statistics.median(t['import_ms'] for t in timings),
+        'import_ms_min': min(t['import_ms'] for t in timings),
+        'client_ms_median': statistics.median(t['client_ms'] for t in timings),
+        'modules': timings[-1]['modules'],
+        'requests_loaded': timings[-1]['requests_loaded'],
+        'peak_kb': memory['peak_kb'],
+    }
+    if args.json:
+        print(json.dumps(summary))
+    else:
+        for key, value in summary.items():
+            print('{:<18} {}'.format(key, round(value, 2) if isinstance(value, float) else value))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Per-request overhead of the client with a requests session and with the
+urllib3 transport, against a local HTTP server answering a small JSON body.
+Run from the repository root:
+
+    python benchmarks/transport.py --requests 5000
+"""
+import argparse
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from office365_api.v2.client import MicrosoftGraphClient  # noqa: E402
+from office365_api.v2.transport import Urllib3Transport  # noqa: E402
+
+BODY = json.dumps({'id': 'AAMkAGI2', 'subject': 'Benchmark', 'isRead': False}).encode('utf-8')
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # headers and body are separate writes, avoid waiting for delayed ACKs
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def requests_session():
+    import requests
+    session = requests.Session()
+    session.hooks['response'].append(lambda resp, *args, **kwargs: resp.raise_for_status())
+    return session
+
+
+def run(session, base_url, count):
+    client = MicrosoftGraphClient(session)
+    service = client.users('someone@example.com').message
+    service.base_url = base_url
+    service.get('warmup')
+    start_cpu, start = time.process_time(), time.perf_counter()
+    for _ in range(count):
+        service.get('AAMkAGI2')
+    elapsed, cpu = time.perf_counter() - start, time.process_time() - start_cpu
+    return {'requests_per_s': count / elapsed, 'us_per_request': elapsed / count * 1e6,
+            'cpu_us_per_request': cpu / count * 1e6}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--json', action='store_true', help='print the results as JSON')
+    args = parser.parse_args(argv)
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = 'http://127.0.0.1:%d' % server.server_port
+    try:
+        results = {
+            'requests': run(requests_session(), base_url, args.requests),
+            'urllib3': run(Urllib3Transport(), base_url, args.requests),
+        }
+    finally:
+        server.shutdown()
+    # the server runs in the same process, CPU times include its share
+    if args.json:
+        print(json.dumps(results))
+    else:
+        print('{:<10} {:>14} {:>14} {:>18}'.format('transport', 'requests/s', 'us/request', 'cpu us/request'))
+        for name, result in results.items():
+            print('{:<10} {:>14.0f} {:>14.1f} {:>18.1f}'.format(
+                name, result['requests_per_s'], result['us_per_request'], result['cpu_us_per_request']))
+
+
+if __name__ == '__main__':
+    main()
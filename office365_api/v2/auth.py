@@ -0,0 +1,134 @@
+import heapq
+import logging
+import threading
+import time
+from typing import Dict, Tuple
+
+from .coalescing import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCOPE = 'https://graph.microsoft.com/.default'
+
+
+class BaseTokenProvider(object):
+    """Acquire access tokens, e.g. with MSAL's `acquire_token_for_client`."""
+    def fetch_token(self, tenant_id: str, scope: str) -> Tuple[str, float]:
+        """Return a new access token and its lifetime in seconds."""
+        raise NotImplementedError
+
+
+class _CachedToken(object):
+    __slots__ = ('access_token', 'expires_at', 'usable_until', 'refresh_at')
+
+    def __init__(self, access_token, expires_at, usable_until, refresh_at):
+        self.access_token = access_token
+        self.expires_at = expires_at
+        # no longer handed out past this point, it could expire in flight
+        self.usable_until = usable_until
+        self.refresh_at = refresh_at
+
+
+class TokenCache(object):
+    """
+    Thread-safe access token cache keyed by tenant and scope.
+
+    Tokens are refreshed by a background thread `refresh_margin` seconds
+    before they expire (half their lifetime for short lived tokens, at most
+    every `min_refresh_interval` seconds), and are not handed out within
+    `expiry_skew` seconds of their expiry. Callers needing a token nobody holds yet wait on a
+    single in-flight refresh. One cache can be shared by the clients of
+    several tenants; tokens not asked for within `idle_timeout` seconds are
+    no longer refreshed but dropped. `close()` stops the background thread.
+    """
+    def __init__(self, provider: BaseTokenProvider, refresh_margin: float = 300.0, background_refresh: bool = True,
+                 min_refresh_interval: float = 30.0, expiry_skew: float = 30.0, idle_timeout: float = 3600.0):
+        self.provider = provider
+        self.refresh_margin = refresh_margin
+        self.min_refresh_interval = min_refresh_interval
+        self.expiry_skew = expiry_skew
+        self.idle_timeout = idle_timeout
+        self.background_refresh = background_refresh
+        self._tokens: Dict[tuple, _CachedToken] = {}
+        self._last_used: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        self._single_flight = SingleFlight()
+        self._schedule: list = []
+        self._wakeup = threading.Condition(self._lock)
+        self._worker = None
+        self._closed = False
+
+    def get(self, tenant_id: str, scope: str = DEFAULT_SCOPE) -> str:
+        key = (tenant_id, scope)
+        now = time.time()
+        with self._lock:
+            token = self._tokens.get(key)
+            self._last_used[key] = now
+        if token is not None and token.usable_until > now:
+            return token.access_token
+        return self._refresh(key).access_token
+
+    def invalidate(self, tenant_id: str, scope: str = DEFAULT_SCOPE, access_token: str | None = None):
+        """Forget a token rejected by the server, unless it has already been replaced."""
+        key = (tenant_id, scope)
+        with self._lock:
+            token = self._tokens.get(key)
+            if token is not None and (access_token is None or token.access_token == access_token):
+                del self._tokens[key]
+
+    def _refresh(self, key) -> _CachedToken:
+        return self._single_flight.do(key, lambda: self._fetch(key))
+
+    def _fetch(self, key):
+        access_token, expires_in = self.provider.fetch_token(*key)
+        now = time.time()
+        expires_at = now + expires_in
+        # a margin larger than the lifetime would refresh the token again right away
+        refresh_at = max(now + self.min_refresh_interval, expires_at - min(self.refresh_margin, expires_in / 2))
+        token = _CachedToken(access_token, expires_at, expires_at - min(self.expiry_skew, expires_in / 2), refresh_at)
+        with self._lock:
+            self._tokens[key] = token
+            if self.background_refresh and not self._closed:
+                heapq.heappush(self._schedule, (token.refresh_at, key))
+                self._wakeup.notify()
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name='graph-token-refresh', daemon=True)
+                    self._worker.start()
+        return token
+
+    def close(self):
+        """Stop the background refresh, tokens are then fetched when they are asked for."""
+        with self._lock:
+            self._closed = True
+            self._schedule.clear()
+            self._wakeup.notify()
+            worker, self._worker = self._worker, None
+        if worker is not None:
+            worker.join()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._closed and (not self._schedule or self._schedule[0][0] > time.time()):
+                    timeout = self._schedule[0][0] - time.time() if self._schedule else None
+                    self._wakeup.wait(timeout)
+                if self._closed:
+                    return
+                refresh_at, key = heapq.heappop(self._schedule)
+                token = self._tokens.get(key)
+                # skip entries made stale by an invalidation or a newer token
+                if token is None or token.refresh_at > refresh_at:
+                    continue
+                if time.time() - self._last_used.get(key, 0.0) > self.idle_timeout:
+                    # e.g. a tenant the process no longer works for, get() fetches a new token if needed
+                    logger.debug('Dropping the idle access token for %s', key[0])
+                    del self._tokens[key]
+                    self._last_used.pop(key, None)
+                    continue
+            try:
+                self._refresh(key)
+            except Exception:
+                logger.exception('Background refresh of the access token for %s failed', key[0])
+                with self._lock:
+                    if not self._closed:
+                        heapq.heappush(self._schedule, (time.time() + min(30.0, self.refresh_margin / 2), key))
@@ -0,0 +1,124 @@
+import hashlib
+import logging
+import mmap
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+class BlobCache(object):
+    """
+    Size-bounded, content-addressable on-disk cache for downloaded content.
+
+    Keys (resource URLs) point to blobs stored by their SHA-256, so identical
+    content requested through different resources is stored once. Blobs are
+    written atomically, evicted least-recently-used first once `max_bytes` is
+    exceeded and read back through memory-mapped files.
+    """
+    def __init__(self, directory: str, max_bytes: int = 1024 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(directory, 'blobs'), exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(os.path.join(directory, 'index.sqlite3'), check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS keys (key TEXT PRIMARY KEY, digest TEXT NOT NULL)')
+        self._db.execute('CREATE TABLE IF NOT EXISTS blobs (digest TEXT PRIMARY KEY, size INTEGER NOT NULL, '
+                         'last_access REAL NOT NULL)')
+
+    def _blob_path(self, digest):
+        return os.path.join(self.directory, 'blobs', digest[:2], digest)
+
+    def _lookup(self, key):
+        row = self._db.execute('SELECT digest FROM keys WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def open(self, key: str):
+        """Return a read-only memory map of the cached content, or None on a miss."""
+        with self._lock:
+            digest = self._lookup(key)
+            if digest is None:
+                return None
+            try:
+                with open(self._blob_path(digest), 'rb') as f:
+                    if os.fstat(f.fileno()).st_size == 0:
+                        content = b''
+                    else:
+                        content = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except FileNotFoundError:
+                self._db.execute('DELETE FROM keys WHERE digest = ?', (digest,))
+                self._db.execute('DELETE FROM blobs WHERE digest = ?', (digest,))
+                return None
+            self._db.execute('UPDATE blobs SET last_access = ? WHERE digest = ?', (time.time(), digest))
+            return content
+
+    def get(self, key: str) -> bytes | None:
+        content = self.open(key)
+        if content is None or isinstance(content, bytes):
+            return content
+        with content:
+            return content[:]
+
+    def put(self, key: str, data: bytes) -> str:
+        return self.put_stream(key, [data])
+
+    def put_stream(self, key: str, chunks: Iterable[bytes]) -> str:
+        """Store streamed content under `key`; returns its digest."""
+        sha = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.join(self.directory, 'blobs'), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    sha.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+            digest = sha.hexdigest()
+            blob_path = self._blob_path(digest)
+            with self._lock:
+                if os.path.exists(blob_path):
+                    os.unlink(tmp_path)
+                else:
+                    os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                    os.replace(tmp_path, blob_path)
+                self._db.execute('INSERT OR REPLACE INTO blobs (digest, size, last_access) VALUES (?, ?, ?)',
+                                 (digest, size, time.time()))
+                self._db.execute('INSERT OR REPLACE INTO keys (key, digest) VALUES (?, ?)', (key, digest))
+                self._evict()
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return digest
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], bytes]) -> bytes:
+        content = self.get(key)
+        if content is None:
+            content = fetch()
+            self.put(key, content)
+        return content
+
+    def _evict(self):
+        total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM blobs').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for digest, size in self._db.execute('SELECT digest, size FROM blobs ORDER BY last_access').fetchall():
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(self._blob_path(digest))
+            except FileNotFoundError:
+                pass
+            self._db.execute('DELETE FROM keys WHERE digest = ?', (digest,))
+            self._db.execute('DELETE FROM blobs WHERE digest = ?', (digest,))
+            total -= size
+            logger.debug('Evicted blob %s (%s bytes)', digest, size)
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,119 @@
+"""
+Bulk writes through $batch.
+
+Service helpers such as `EventService.bulk_create` cover the common cases.
+Requests built for several services can be chained with `execute_bulk`, e.g.
+to create a category before the events using it:
+
+    requests = [as_batch_request(user.outlook.masterCategories).create(displayName='CRM')]
+    requests += [as_batch_request(user.event).create(**event) for event in events]
+    results = execute_bulk(client, requests, depends_on={i: [0] for i in range(1, len(requests))})
+"""
+import copy
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List
+
+from .consts import BATCH_MAX_REQUESTS
+from .exceptions import Office365ClientError, Office365ServerError
+
+logger = logging.getLogger(__name__)
+
+
+class BulkResult(object):
+    """Outcome of one item of a bulk operation."""
+    __slots__ = ('index', 'body', 'exception')
+
+    def __init__(self, index: int, body: Any = None, exception: Exception | None = None):
+        self.index = index
+        self.body = body
+        self.exception = exception
+
+    @property
+    def ok(self) -> bool:
+        return self.exception is None
+
+    def __repr__(self):
+        return '<BulkResult {} {}>'.format(self.index, 'ok' if self.ok else repr(self.exception))
+
+
+def _chunk(count, depends_on, chunk_size):
+    # requests chained with dependsOn must travel in the same batch
+    groups = list(range(count))
+
+    def find(i):
+        while groups[i] != i:
+            groups[i] = groups[groups[i]]
+            i = groups[i]
+        return i
+
+    for index, dependencies in depends_on.items():
+        for dependency in dependencies:
+            if not 0 <= dependency < index:
+                raise ValueError('Request {} can only depend on a previous request, got {}'.format(index, dependency))
+            groups[find(index)] = find(dependency)
+    components: Dict[int, List[int]] = {}
+    for index in range(count):
+        components.setdefault(find(index), []).append(index)
+
+    chunks: List[List[int]] = []
+    current: List[int] = []
+    for component in components.values():
+        if len(component) > chunk_size:
+            raise ValueError('{} chained requests do not fit in a batch of {}'.format(len(component), chunk_size))
+        if len(current) + len(component) > chunk_size:
+            chunks.append(current)
+            current = []
+        current.extend(component)
+    if current:
+        chunks.append(current)
+    return [sorted(chunk) for chunk in chunks]
+
+
+def execute_bulk(client, requests: Iterable[dict], depends_on: Dict[int, Iterable[int]] | None = None,
+                 chunk_size: int = BATCH_MAX_REQUESTS, max_in_flight: int = 4, beta: bool = False) -> List[BulkResult]:
+    """
+    Send batch requests in chunks of `chunk_size` with at most `max_in_flight`
+    batches running at once.
+
+    `depends_on` maps a request index to the indexes of earlier requests it
+    depends on. Results are returned in input order, a failed item carries the
+    exception instead of raising it.
+    """
+    requests = list(requests)
+    depends_on = {index: list(dependencies) for index, dependencies in (depends_on or {}).items()}
+    chunk_size = min(chunk_size, BATCH_MAX_REQUESTS)
+    results = [BulkResult(index) for index in range(len(requests))]
+
+    def run(chunk):
+        completed = set()
+        try:
+            batch = client.new_batch_request(beta=beta)
+            request_ids = {}
+            for index in chunk:
+                request = copy.copy(requests[index])
+                if index in depends_on:
+                    request['dependsOn'] = [request_ids[dependency] for dependency in depends_on[index]]
+
+                def callback(request_id, body, exception, index=index):
+                    results[index].body = body
+                    results[index].exception = exception
+                    completed.add(index)
+                request_ids[index] = batch.add(request, callback)
+            batch.execute()
+        except Exception as e:
+            # connection or decoding errors fail the chunk, not the whole run
+            log = logger.warning if isinstance(e, (Office365ClientError, Office365ServerError)) else logger.exception
+            log('Bulk batch of %s requests failed: %s', len(chunk), e)
+            for index in chunk:
+                if index not in completed:
+                    results[index].exception = e
+
+    chunks = _chunk(len(requests), depends_on, chunk_size)
+    if len(chunks) == 1 or max_in_flight <= 1:
+        for chunk in chunks:
+            run(chunk)
+    else:
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            list(executor.map(run, chunks))
+    return results
@@ -1,18 +1,50 @@
 # -*- coding: utf-8 -*-
+from functools import cached_property
 
-
+from .auth import DEFAULT_SCOPE, TokenCache
+from .coalescing import SingleFlight
 from .factories.user_factory import UserServicesFactory
-from .services import BatchService, SubscriptionService
 
 
 class MicrosoftGraphClient(object):
-    def __init__(self, session):
+    def __init__(self, session, coalesce_requests=False, blob_cache=None,
+                 token_provider=None, tenant_id='common', scope=DEFAULT_SCOPE, scheduler=None,
+                 page_sizer=None, immutable_ids=False, hedging=None):
         self.http = None  # backward compatibility
         self.session = session
+        # concurrent identical GET requests share a single network call when enabled
+        self.single_flight = SingleFlight() if coalesce_requests else None
+        # optional BlobCache serving repeated attachment, recording and transcript downloads
+        self.blob_cache = blob_cache
+        # when set, the client authorizes requests itself instead of relying on the session
+        if token_provider is not None and not isinstance(token_provider, TokenCache):
+            token_provider = TokenCache(token_provider)
+        self.token_cache = token_provider
+        self.tenant_id = tenant_id
+        self.scope = scope
+        # optional RequestScheduler ordering requests by priority class
+        self.scheduler = scheduler
+        # optional AdaptivePageSizer choosing the size of the pages followed by iter_pages
+        self.page_sizer = page_sizer
+        # ask for ids that survive moves between folders on every request, see translate_exchange_ids
+        self.immutable_ids = immutable_ids
+        # optional HedgingPolicy sending a second copy of slow idempotent GETs
+        self.hedging = hedging
 
         self.users = UserServicesFactory(self)
         self.me = self.users('me')
-        self.subscription = SubscriptionService(self, '')
+
+    @cached_property
+    def subscription(self):
+        from .services.subscription import SubscriptionService
+        return SubscriptionService(self, '')
+
+    def get_access_token(self):
+        return self.token_cache.get(self.tenant_id, self.scope)
+
+    def invalidate_access_token(self, access_token):
+        self.token_cache.invalidate(self.tenant_id, self.scope, access_token)
 
     def new_batch_request(self, beta=True):
-        return BatchService(client=self, beta=beta)
+        from .services.batch import BatchService
+        return BatchService(client=self, beta=beta, coalesce=self.single_flight is not None)
@@ -0,0 +1,52 @@
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+# Headers that change the shape of a response; anything else (request ids,
+# user agents, ...) does not prevent two requests from being coalesced.
+COALESCING_HEADERS = ('prefer', 'accept', 'consistencylevel', 'authorization')
+
+
+def coalescing_key(method: str, url: str, headers: dict | None = None) -> tuple:
+    relevant = tuple(sorted(
+        (k.lower(), v) for k, v in (headers or {}).items() if k.lower() in COALESCING_HEADERS))
+    return method.upper(), url, relevant
+
+
+class _Call(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.exception: BaseException | None = None
+
+
+class SingleFlight(object):
+    """
+    Share one in-flight call between concurrent callers asking for the same key.
+
+    Every waiter receives the very same result object (or exception) as the
+    caller that actually performed the request.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.exception = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        if call.exception is not None:
+            raise call.exception
+        return call.result
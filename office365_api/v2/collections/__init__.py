@@ -1,11 +1,30 @@
-from .services_collection import ServicesCollection
-from .user_services_collection import UserServicesCollection
-from .outlook_services_collection import OutlookServicesCollection
-from .online_meeting_services_collection import OnlineMeetingServicesCollection
-
-__all__ = [
-    "ServicesCollection",
-    "UserServicesCollection",
-    "OutlookServicesCollection",
-    "OnlineMeetingServicesCollection",
-]
+import importlib
+from typing import TYPE_CHECKING
+
+_COLLECTIONS = {
+    "ServicesCollection": ".services_collection",
+    "UserServicesCollection": ".user_services_collection",
+    "OutlookServicesCollection": ".outlook_services_collection",
+    "OnlineMeetingServicesCollection": ".online_meeting_services_collection",
+}
+
+__all__ = list(_COLLECTIONS)
+
+
+def __getattr__(name):
+    if name not in _COLLECTIONS:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    value = getattr(importlib.import_module(_COLLECTIONS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from .online_meeting_services_collection import OnlineMeetingServicesCollection
+    from .outlook_services_collection import OutlookServicesCollection
+    from .services_collection import ServicesCollection
+    from .user_services_collection import UserServicesCollection
@@ -1,8 +1,8 @@
-from ..services import MasterCategoriesService
-from .services_collection import ServicesCollection
+from .services_collection import ServicesCollection, lazy_member
 
 class OutlookServicesCollection(ServicesCollection):
     """Wrap a collection of services grouped by 'outlook' context."""
+    masterCategories = lazy_member('..services.master_categories', 'MasterCategoriesService')
+
     def __init__(self, client, prefix):
         super().__init__(client, prefix + '/outlook')
-        self.masterCategories = MasterCategoriesService(self.client, self.prefix)
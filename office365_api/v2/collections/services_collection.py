@@ -1,4 +1,19 @@
+import importlib
+from functools import cached_property
+
+
 class ServicesCollection(object):
     def __init__(self, client, prefix):
         self.client = client
         self.prefix = prefix
+
+
+def lazy_member(module, name):
+    """
+    Collection attribute holding `name(client, prefix)`, created on first
+    access. `module` is relative to the collections package, so the service
+    module is only imported when the attribute is used.
+    """
+    def create(self):
+        return getattr(importlib.import_module(module, __package__), name)(self.client, self.prefix)
+    return cached_property(create)
@@ -1,38 +1,20 @@
-
-
-from ..services import (CalendarService,
-                        CalendarViewService,
-                        EventService,
-                        EventServiceBeta,
-                        MessageService,
-                        AttachmentService,
-                        ContactFolderService,
-                        ContactService,
-                        MailFolderService,
-                        UserService,
-                        MailboxSettingsService,
-                        OnlineMeetingService)
-
-from ..collections.services_collection import ServicesCollection
-from ..collections.outlook_services_collection import OutlookServicesCollection
+from ..collections.services_collection import ServicesCollection, lazy_member
 
 
 class UserServicesCollection(ServicesCollection):
     """Wrap a collection of services in a context."""
-    def __init__(self, client, prefix):
-        super().__init__(client, prefix)
-        self.calendar = CalendarService(self.client, self.prefix)
-        self.calendarview = CalendarViewService(self.client, self.prefix)
-        self.event = EventService(self.client, self.prefix)
-        self.event_beta = EventServiceBeta(self.client, self.prefix)
-        self.message = MessageService(self.client, self.prefix)
-        self.attachment = AttachmentService(self.client, self.prefix)
-        self.contactfolder = ContactFolderService(self.client, self.prefix)
-        self.contact = ContactService(self.client, self.prefix)
-        self.mailfolder = MailFolderService(self.client, self.prefix)
-        self.user = UserService(self.client, self.prefix)
-        self.mailboxSettings = MailboxSettingsService(self.client, self.prefix)
-        self.outlook = OutlookServicesCollection(self.client, self.prefix)
-        self.onlineMeeting = OnlineMeetingService(self.client, self.prefix)
-        from ..factories.online_meeting_factory import OnlineMeetingServicesFactory
-        self.onlineMeetings = OnlineMeetingServicesFactory(self.client, self.prefix)
+    calendar = lazy_member('..services.calendar', 'CalendarService')
+    calendarview = lazy_member('..services.calendar_view', 'CalendarViewService')
+    schedule = lazy_member('..services.schedule', 'ScheduleService')
+    event = lazy_member('..services.event', 'EventService')
+    event_beta = lazy_member('..services.event_service_beta', 'EventServiceBeta')
+    message = lazy_member('..services.message', 'MessageService')
+    attachment = lazy_member('..services.attachment', 'AttachmentService')
+    contactfolder = lazy_member('..services.contact_folder', 'ContactFolderService')
+    contact = lazy_member('..services.contact', 'ContactService')
+    mailfolder = lazy_member('..services.mail_folder', 'MailFolderService')
+    user = lazy_member('..services.user', 'UserService')
+    mailboxSettings = lazy_member('..services.mailbox_settings', 'MailboxSettingsService')
+    outlook = lazy_member('.outlook_services_collection', 'OutlookServicesCollection')
+    onlineMeeting = lazy_member('..services.online_meeting', 'OnlineMeetingService')
+    onlineMeetings = lazy_member('..factories.online_meeting_factory', 'OnlineMeetingServicesFactory')
@@ -2,3 +2,8 @@ DEFAULT_MAX_ENTRIES = 50
 RETRIES_COUNT = 2
 RESPONSE_FORMAT_ODATA = 'odata'
 RESPONSE_FORMAT_RAW = 'raw'
+BATCH_MAX_REQUESTS = 20
+STREAM_CHUNK_SIZE = 64 * 1024
+IMMUTABLE_ID_PREFERENCE = 'IdType="ImmutableId"'
+# translateExchangeIds accepts at most 1000 ids per request
+TRANSLATE_IDS_MAX = 1000
@@ -0,0 +1,171 @@
+"""
+Checkpointed `@odata.nextLink` cursors, so interrupted list scans resume
+where they stopped instead of starting over from the first page:
+
+    store = SQLiteCursorStore('cursors.sqlite3')
+    scan = ResumableScan(user.message, 'messages:' + user_id, store,
+                         lambda: user.message.list(max_entries=100), max_entries=100)
+    for page in scan:
+        process(page['value'])
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from typing import Callable, Dict, Iterator, Tuple
+
+from .consts import DEFAULT_MAX_ENTRIES
+from .exceptions import Office365ClientError
+
+logger = logging.getLogger(__name__)
+
+EXPIRED_CURSOR_ERROR_CODES = ('syncstatenotfound', 'syncstateinvalid', 'resyncrequired', 'invalidskiptoken')
+
+
+def is_expired_cursor(e: Office365ClientError) -> bool:
+    return e.status_code == 410 or (e.error_code or '').lower() in EXPIRED_CURSOR_ERROR_CODES
+
+
+class BaseCursorStore(object):
+    def load(self, key: str) -> dict | None:
+        raise NotImplementedError
+
+    def save(self, key: str, cursor: dict):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+
+class MemoryCursorStore(BaseCursorStore):
+    def __init__(self):
+        self._cursors: Dict[str, dict] = {}
+
+    def load(self, key):
+        cursor = self._cursors.get(key)
+        return dict(cursor) if cursor is not None else None
+
+    def save(self, key, cursor):
+        self._cursors[key] = dict(cursor)
+
+    def delete(self, key):
+        self._cursors.pop(key, None)
+
+
+class FileCursorStore(BaseCursorStore):
+    """One JSON file per cursor, replaced atomically on every save."""
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    def load(self, key):
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, key, cursor):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(dict(cursor, key=key), f)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def delete(self, key):
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class SQLiteCursorStore(BaseCursorStore):
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS cursors (key TEXT PRIMARY KEY, cursor TEXT NOT NULL)')
+
+    def load(self, key):
+        with self._lock:
+            row = self._db.execute('SELECT cursor FROM cursors WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, key, cursor):
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO cursors (key, cursor) VALUES (?, ?)', (key, json.dumps(cursor)))
+
+    def delete(self, key):
+        with self._lock:
+            self._db.execute('DELETE FROM cursors WHERE key = ?', (key,))
+
+    def close(self):
+        self._db.close()
+
+
+class ResumableScan(object):
+    """
+    Iterate the pages of a list call, saving the next link and the number of
+    processed items once a page is acknowledged, i.e. when the next one is
+    requested.
+
+    A saved cursor is resumed automatically. When the server no longer
+    accepts a next link, the scan restarts once with `first_page` and
+    `restarted` is set, so items processed before may be seen again.
+    """
+    def __init__(self, service, key: str, store: BaseCursorStore, first_page: Callable[[], Tuple[dict, str]],
+                 max_entries: int = DEFAULT_MAX_ENTRIES, fields=None):
+        self.service = service
+        self.key = key
+        self.store = store
+        self.first_page = first_page
+        self.max_entries = max_entries
+        self.fields = fields
+        self.processed = 0
+        self.restarted = False
+
+    def _start(self):
+        cursor = self.store.load(self.key)
+        if cursor:
+            try:
+                resp, next_link = self.service.follow_next_link(
+                    cursor['next_link'], max_entries=self.max_entries, fields=self.fields)
+                self.processed = cursor.get('processed', 0)
+                logger.info('Resuming %s after %s items', self.key, self.processed)
+                return resp, next_link
+            except Office365ClientError as e:
+                return self._restart(e)
+        self.processed = 0
+        return self.first_page()
+
+    def _restart(self, e):
+        if self.restarted or not is_expired_cursor(e):
+            raise e
+        logger.warning('Cursor of %s expired (%s), restarting the scan', self.key, e)
+        self.store.delete(self.key)
+        self.restarted = True
+        self.processed = 0
+        return self.first_page()
+
+    def __iter__(self) -> Iterator[dict]:
+        resp, next_link = self._start()
+        while True:
+            yield resp
+            self.processed += len(resp.get('value', []))
+            if not next_link:
+                self.store.delete(self.key)
+                return
+            self.store.save(self.key, {'next_link': next_link, 'processed': self.processed})
+            try:
+                resp, next_link = self.service.follow_next_link(
+                    next_link, max_entries=self.max_entries, fields=self.fields)
+            except Office365ClientError as e:
+                resp, next_link = self._restart(e)
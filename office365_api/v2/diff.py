@@ -0,0 +1,71 @@
+"""
+Minimal PATCH payloads from the last known and the desired state of a resource.
+
+Only the properties mentioned in the desired state are compared; a property
+has to be set to None to be cleared. Complex values (start, body, location,
+recurrence, ...) and collections (attendees, categories, ...) are sent as a
+whole when anything in them changed, which is what Graph expects, but are
+compared on the keys of the desired value only, so that server maintained
+fields like an attendee response status don't count as changes.
+"""
+import datetime
+import re
+
+_DATETIME_RE = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}(:\d{2}(\.\d+)?)?(Z|[+-]\d{2}:\d{2})?$')
+
+
+def _normalize(value):
+    # Graph returns 7 fractional digits, '2024-01-01T10:00:00.0000000' and '2024-01-01T10:00:00' are equal
+    match = _DATETIME_RE.match(value) if isinstance(value, str) else None
+    if match is None:
+        return value
+    fraction = match.group(2) or ''
+    zone = match.group(3) or ''
+    try:
+        parsed = datetime.datetime.fromisoformat(value[:len(value) - len(fraction) - len(zone)] + zone.replace('Z', '+00:00'))
+    except ValueError:
+        return value
+    return parsed, float('0' + fraction) if fraction else 0.0
+
+
+def matches(current, desired) -> bool:
+    """True when `current` already holds everything `desired` asks for."""
+    if isinstance(desired, dict):
+        if not isinstance(current, dict):
+            return False
+        return all(matches(current.get(key), value) for key, value in desired.items())
+    if isinstance(desired, (list, tuple)):
+        if not isinstance(current, (list, tuple)) or len(current) != len(desired):
+            return False
+        if all(matches(c, d) for c, d in zip(current, desired)):
+            return True
+        # same items in another order, e.g. attendees
+        remaining = list(current)
+        for item in desired:
+            for i, candidate in enumerate(remaining):
+                if matches(candidate, item):
+                    del remaining[i]
+                    break
+            else:
+                return False
+        return True
+    return _normalize(current) == _normalize(desired)
+
+
+def diff_patch(current: dict, desired: dict) -> dict:
+    """Top level properties of `desired` that differ from `current`."""
+    return {key: value for key, value in desired.items() if not matches(current.get(key), value)}
+
+
+class MinimalPatchMixin(object):
+    """For services with an `update(resource_id, **kwargs)` method."""
+    def update_changes(self, resource_id, current: dict, desired: dict, **options):
+        """
+        PATCH only what differs between the last known server state `current`
+        and `desired`. Returns None without sending anything when nothing
+        changed. `options` are passed to `update`, e.g. the event `path`.
+        """
+        changes = diff_patch(current, desired)
+        if not changes:
+            return None
+        return self.update(resource_id, **options, **changes)
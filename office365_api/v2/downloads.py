@@ -0,0 +1,139 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .consts import STREAM_CHUNK_SIZE
+from .exceptions import Office365ClientError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+
+
+# serializes seek + write where there is no pwrite, the file position is shared by every worker
+_seek_write_lock = threading.Lock()
+
+
+def _write_at(fd, data, offset):
+    if hasattr(os, 'pwrite'):
+        while data:
+            written = os.pwrite(fd, data, offset)
+            data = data[written:]
+            offset += written
+    else:
+        with _seek_write_lock:
+            os.lseek(fd, offset, os.SEEK_SET)
+            while data:
+                data = data[os.write(fd, data):]
+
+
+class RangedDownload(object):
+    """
+    Download content over several connections with HTTP Range requests.
+
+    Parts are written at their offset in a preallocated file. Completed parts
+    are recorded in a `<destination>.parts` sidecar file, so an interrupted
+    download resumes with the missing parts only. Servers ignoring Range
+    requests get a plain streamed download.
+    """
+    def __init__(self, service, path: str, destination: str, query_params=None,
+                 part_size: int = DEFAULT_PART_SIZE, max_workers: int = 4):
+        self.service = service
+        self.path = path
+        self.destination = destination
+        self.query_params = query_params
+        self.part_size = part_size
+        self.max_workers = max_workers
+        self.sidecar_path = destination + '.parts'
+        self._lock = threading.Lock()
+
+    def _open_range(self, start, end):
+        return self.service.open_stream('get', self.path, query_params=self.query_params,
+                                        headers={'Range': 'bytes={}-{}'.format(start, end)})
+
+    def _load_state(self, size):
+        try:
+            with open(self.sidecar_path) as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return set()
+        if state.get('size') != size or state.get('part_size') != self.part_size or \
+                not os.path.exists(self.destination):
+            return set()
+        return set(state.get('done', []))
+
+    def _save_state(self, size, done):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.sidecar_path)), prefix='.tmp-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'size': size, 'part_size': self.part_size, 'done': sorted(done)}, f)
+        os.replace(tmp_path, self.sidecar_path)
+
+    def run(self) -> int:
+        """Download the content, returns its size."""
+        try:
+            resp = self._open_range(0, 0)
+        except Office365ClientError as e:
+            if e.status_code != 416:
+                raise
+            # nothing to download
+            open(self.destination, 'wb').close()
+            return 0
+        content_range = resp.headers.get('Content-Range', '')
+        if resp.status_code != 206 or '/' not in content_range or content_range.endswith('/*'):
+            logger.info('Range requests not supported for %s, downloading in one stream', self.path)
+            return self._download_whole(resp)
+        resp.close()
+        size = int(content_range.rsplit('/', 1)[1])
+
+        done = self._load_state(size)
+        parts = [i for i in range((size + self.part_size - 1) // self.part_size) if i not in done]
+        if done:
+            logger.info('Resuming download of %s, %s parts left', self.path, len(parts))
+        fd = os.open(self.destination, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+        try:
+            if os.fstat(fd).st_size != size:
+                os.ftruncate(fd, size)
+            self._save_state(size, done)
+
+            def fetch(index):
+                start = index * self.part_size
+                end = min(start + self.part_size, size) - 1
+                part = self._open_range(start, end)
+                try:
+                    if part.status_code != 206:
+                        raise Office365ClientError(part.status_code, error_message='Range request was not honoured')
+                    offset = start
+                    for chunk in part.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                        _write_at(fd, chunk, offset)
+                        offset += len(chunk)
+                    if offset != end + 1:
+                        raise Office365ClientError(part.status_code, error_message='Incomplete range {}-{}'.format(start, end))
+                finally:
+                    part.close()
+                os.fsync(fd)
+                with self._lock:
+                    done.add(index)
+                    self._save_state(size, done)
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                list(executor.map(fetch, parts))
+        finally:
+            os.close(fd)
+        os.unlink(self.sidecar_path)
+        return size
+
+    def _download_whole(self, resp):
+        size = 0
+        try:
+            with open(self.destination, 'wb') as f:
+                for chunk in resp.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                    f.write(chunk)
+                    size += len(chunk)
+        finally:
+            resp.close()
+        if os.path.exists(self.sidecar_path):
+            os.unlink(self.sidecar_path)
+        return size
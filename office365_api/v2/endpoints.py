@@ -0,0 +1,151 @@
+"""
+Registry of the Graph endpoints used by the v2 services.
+
+Every endpoint has a low-cardinality name (e.g. `messages.get`), a route
+template relative to the service prefix and metadata that retry, batching,
+caching or metrics code can rely on instead of parsing raw URLs:
+
+    endpoint = ENDPOINTS['messages.get']
+    endpoint.path(message_id=message_id)  # '/messages/AAMk...%3D'
+"""
+import re
+import urllib.parse
+from typing import Dict
+
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+_PARAM_RE = re.compile(r'\{(\w+)\}')
+
+
+def quote_id(value) -> str:
+    """Percent-encode an id for use as a single path segment."""
+    return urllib.parse.quote(str(value), safe='=')
+
+
+class Endpoint(object):
+    __slots__ = ('name', 'method', 'template', 'pageable', 'batchable', 'idempotent', '_parts', 'params')
+
+    def __init__(self, name: str, method: str, template: str, pageable: bool = False, batchable: bool = True,
+                 idempotent: bool | None = None):
+        self.name = name
+        self.method = method.lower()
+        self.template = template
+        self.pageable = pageable
+        self.batchable = batchable
+        self.idempotent = method.upper() in IDEMPOTENT_METHODS if idempotent is None else idempotent
+        # literals at even indexes, parameter names at odd ones
+        self._parts = _PARAM_RE.split(template)
+        self.params = tuple(self._parts[1::2])
+
+    def path(self, **params) -> str:
+        parts = list(self._parts)
+        for i in range(1, len(parts), 2):
+            try:
+                parts[i] = quote_id(params[parts[i]])
+            except KeyError:
+                raise ValueError('Missing {!r} to build the path of {}'.format(parts[i], self.name)) from None
+        return ''.join(parts)
+
+    def __repr__(self):
+        return '<Endpoint {} {} {}>'.format(self.name, self.method.upper(), self.template)
+
+
+ENDPOINTS: Dict[str, Endpoint] = {}
+
+
+def register(name: str, method: str, template: str, **metadata) -> Endpoint:
+    if name in ENDPOINTS:
+        raise ValueError('Endpoint {} is already registered'.format(name))
+    endpoint = ENDPOINTS[name] = Endpoint(name, method, template, **metadata)
+    return endpoint
+
+
+register('attachments.list', 'get', '/messages/{message_id}/attachments', pageable=True)
+register('attachments.get', 'get', '/messages/{message_id}/attachments/{attachment_id}')
+register('attachments.content', 'get', '/messages/{message_id}/attachments/{attachment_id}/$value', batchable=False)
+register('attachments.create', 'post', '/messages/{message_id}/attachments')
+
+register('calendar.get', 'get', '/calendar')
+register('calendars.list', 'get', '/calendars', pageable=True)
+register('calendars.get', 'get', '/calendars/{calendar_id}')
+register('calendars.create', 'post', '/calendars')
+register('calendars.update', 'patch', '/calendars/{calendar_id}')
+register('calendars.delete', 'delete', '/calendars/{calendar_id}')
+
+register('calendar_view.list', 'get', '/calendarView', pageable=True)
+register('calendar_view.calendar_list', 'get', '/calendars/{calendar_id}/calendarView', pageable=True)
+register('calendar_view.delta', 'get', '/calendarView/delta', pageable=True)
+register('calendar_view.calendar_delta', 'get', '/calendars/{calendar_id}/calendarView/delta', pageable=True)
+
+register('contacts.list', 'get', '/contacts', pageable=True)
+register('contacts.folder_list', 'get', '/contactFolders/{contact_folder_id}/contacts', pageable=True)
+register('contacts.create', 'post', '/contacts')
+register('contacts.folder_create', 'post', '/contactFolders/{contact_folder_id}/contacts')
+register('contacts.get', 'get', '/contacts/{contact_id}')
+register('contacts.update', 'patch', '/contacts/{contact_id}')
+register('contacts.delete', 'delete', '/contacts/{contact_id}')
+
+register('contact_folders.list', 'get', '/contactFolders', pageable=True)
+register('contact_folders.get', 'get', '/contactFolders/{folder_id}')
+register('contact_folders.create', 'post', '/contactFolders')
+register('contact_folders.contacts_delta', 'get', "/contactFolders('{folder_id}')/contacts/delta", pageable=True)
+
+register('events.list', 'get', '/calendar/events', pageable=True)
+register('events.calendar_list', 'get', '/calendars/{calendar_id}/events', pageable=True)
+register('events.create', 'post', '/calendar/events')
+register('events.calendar_create', 'post', '/calendars/{calendar_id}/events')
+register('events.get', 'get', '/calendar/events/{event_id}')
+register('events.update', 'patch', '/calendar/events/{event_id}')
+register('events.delete', 'delete', '/calendar/events/{event_id}')
+register('events_beta.get', 'get', '/events/{event_id}')
+register('events_beta.list', 'get', '/calendar/events', pageable=True)
+register('events_beta.calendar_list', 'get', '/calendars/{calendar_id}/events', pageable=True)
+
+register('mail_folders.list', 'get', '/mailFolders', pageable=True)
+register('mail_folders.create', 'post', '/mailFolders')
+register('mail_folders.get', 'get', '/mailFolders/{folder_id}')
+register('mail_folders.delta', 'get', '/mailFolders/delta', pageable=True)
+register('mail_folders.messages_delta', 'get', '/mailFolders/{folder_id}/messages/delta', pageable=True)
+register('mail_folders.child_list', 'get', '/mailFolders/{folder_id}/childFolders', pageable=True)
+register('mail_folders.child_create', 'post', '/mailFolders/{folder_id}/childFolders')
+
+register('mailbox_settings.get', 'get', '/mailboxSettings')
+
+register('master_categories.list', 'get', '/masterCategories', pageable=True)
+register('master_categories.create', 'post', '/masterCategories')
+register('master_categories.get', 'get', '/masterCategories/{category_id}')
+register('master_categories.update', 'patch', '/masterCategories/{category_id}')
+register('master_categories.delete', 'delete', '/masterCategories/{category_id}')
+
+register('messages.list', 'get', '/messages', pageable=True)
+register('messages.create', 'post', '/messages')
+register('messages.get', 'get', '/messages/{message_id}')
+register('messages.raw', 'get', '/messages/{message_id}/$value', batchable=False)
+register('messages.update', 'patch', '/messages/{message_id}')
+register('messages.send', 'post', '/messages/{message_id}/send')
+register('messages.move', 'post', '/messages/{message_id}/move')
+
+register('online_meetings.list', 'get', 'onlineMeetings', pageable=True)
+register('online_meetings.create', 'post', 'onlineMeetings')
+register('online_meetings.get', 'get', 'onlineMeetings/{meeting_id}')
+register('online_meetings.update', 'patch', 'onlineMeetings/{meeting_id}')
+register('online_meetings.delete', 'delete', 'onlineMeetings/{meeting_id}')
+
+register('recordings.list', 'get', 'recordings', pageable=True)
+register('recordings.get', 'get', 'recordings/{recording_id}')
+register('recordings.content', 'get', 'recordings/{recording_id}/content', batchable=False)
+
+register('transcripts.list', 'get', 'transcripts', pageable=True)
+register('transcripts.get', 'get', 'transcripts/{transcript_id}')
+register('transcripts.content', 'get', 'transcripts/{transcript_id}/content', batchable=False)
+
+# a read, even though it is a POST
+register('schedule.get', 'post', '/calendar/getSchedule', idempotent=True)
+
+register('subscriptions.create', 'post', 'subscriptions')
+register('subscriptions.renew', 'patch', 'subscriptions/{subscription_id}')
+register('subscriptions.delete', 'delete', 'subscriptions/{subscription_id}')
+
+register('user.get', 'get', '')
+# a conversion without side effects, even though it is a POST
+register('user.translate_exchange_ids', 'post', 'translateExchangeIds', idempotent=True)
@@ -0,0 +1,188 @@
+"""
+Streaming export of list and delta pages to gzip compressed NDJSON.
+
+    with NdjsonExporter('export/messages-{index:05d}.ndjson.gz') as exporter:
+        for user_id in mailboxes:
+            service = client.users(user_id).message
+            exporter.export(service.iter_pages(*service.list(max_entries=100)), mailbox=user_id)
+    print(exporter.progress)
+
+Pages are serialized on the calling thread and handed to a writer thread
+that compresses and writes them. The queue between both is bounded, so the
+memory used doesn't depend on the size of the mailbox.
+"""
+import gzip
+import io
+import json
+import logging
+import os
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROTATE_BYTES = 256 * 1024 * 1024
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+class MailboxProgress(object):
+    __slots__ = ('items', 'pages', 'bytes', 'done')
+
+    def __init__(self):
+        self.items = 0
+        self.pages = 0
+        self.bytes = 0
+        self.done = False
+
+    def __repr__(self):
+        return '<MailboxProgress items={} pages={} bytes={} done={}>'.format(
+            self.items, self.pages, self.bytes, self.done)
+
+
+class NdjsonExporter(object):
+    """
+    Write the items of pages as gzip compressed NDJSON, one item per line.
+
+    `destination` is either a path template formatted with the file `index`,
+    rotated once a file holds `rotate_bytes` of compressed data, or a binary
+    file-like object, which is never rotated nor closed. Files are only cut
+    between pages.
+
+    `on_progress(mailbox, progress)` is called from the writer thread once a
+    page has been written and flushed to the file, e.g. to checkpoint the
+    export; with `fsync` the file is also synced to disk first.
+    """
+    def __init__(self, destination, rotate_bytes: int = DEFAULT_ROTATE_BYTES, compresslevel: int = 6,
+                 max_pending: int = 16, on_progress: Callable[[Any, MailboxProgress], None] | None = None,
+                 fsync: bool = False):
+        self.destination = destination
+        self.rotate_bytes = rotate_bytes
+        self.compresslevel = compresslevel
+        self.on_progress = on_progress
+        self.fsync = fsync
+        self.progress: Dict[Any, MailboxProgress] = {}
+        self.files: List[str] = []
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._error: BaseException | None = None
+        self._raw = None
+        self._gzip = None
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name='ndjson-export', daemon=True)
+        self._writer.start()
+
+    def export(self, pages: Iterable[dict], mailbox=None, transform: Callable[[dict], Any] | None = None) -> int:
+        """
+        Export every item of `pages`, e.g. `service.iter_pages(*service.list())`.
+        `transform` may reshape items, or drop them by returning None.
+        Returns the number of items queued.
+        """
+        if self._closed:
+            raise ValueError('The exporter is closed')
+        count = 0
+        for page in pages:
+            lines = []
+            for item in page.get('value', []):
+                if transform is not None:
+                    item = transform(item)
+                    if item is None:
+                        continue
+                lines.append(_encoder.encode(item))
+            if lines:
+                lines.append('')
+                self._put((mailbox, '\n'.join(lines).encode('utf-8'), len(lines) - 1))
+                count += len(lines) - 1
+        self._put((mailbox, None, 0))
+        return count
+
+    def _put(self, entry):
+        while True:
+            if self._error is not None:
+                raise self._error
+            try:
+                self._queue.put(entry, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _open(self):
+        if isinstance(self.destination, str):
+            path = self.destination.format(index=len(self.files))
+            self.files.append(path)
+            self._raw = open(path, 'wb')
+        else:
+            self._raw = self.destination
+        self._gzip = gzip.GzipFile(fileobj=self._raw, mode='wb', compresslevel=self.compresslevel)
+
+    def _close_file(self):
+        if self._gzip is not None:
+            self._gzip.close()
+            self._sync()
+            if self._raw is not self.destination:
+                self._raw.close()
+            self._gzip = self._raw = None
+
+    def _flush(self):
+        self._gzip.flush()
+        self._sync()
+
+    def _sync(self):
+        self._raw.flush()
+        if self.fsync:
+            try:
+                fileno = self._raw.fileno()
+            except (AttributeError, io.UnsupportedOperation):
+                return
+            os.fsync(fileno)
+
+    def _run(self):
+        try:
+            while True:
+                entry = self._queue.get()
+                if entry is None:
+                    break
+                mailbox, data, items = entry
+                progress = self.progress.setdefault(mailbox, MailboxProgress())
+                if data is None:
+                    progress.done = True
+                else:
+                    if self._gzip is None:
+                        self._open()
+                    self._gzip.write(data)
+                    progress.items += items
+                    progress.pages += 1
+                    progress.bytes += len(data)
+                    if isinstance(self.destination, str) and self._raw.tell() >= self.rotate_bytes:
+                        self._close_file()
+                    elif self.on_progress is not None:
+                        # a checkpoint must not claim pages still sitting in the buffers
+                        self._flush()
+                if self.on_progress is not None:
+                    self.on_progress(mailbox, progress)
+            self._close_file()
+        except BaseException as e:
+            logger.exception('NDJSON export failed')
+            self._error = e
+            # unblock producers waiting for room in the queue
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+    def close(self):
+        """Wait for pending pages to be written and close the current file."""
+        if not self._closed:
+            self._closed = True
+            if self._error is None:
+                self._put(None)
+            self._writer.join()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -1,9 +1,28 @@
-from .base_factory import BaseFactory
-from .online_meeting_factory import OnlineMeetingServicesFactory
-from .user_factory import UserServicesFactory
-
-__all__ = [
-    "BaseFactory",
-    "OnlineMeetingServicesFactory",
-    "UserServicesFactory",
-]
+import importlib
+from typing import TYPE_CHECKING
+
+_FACTORIES = {
+    "BaseFactory": ".base_factory",
+    "OnlineMeetingServicesFactory": ".online_meeting_factory",
+    "UserServicesFactory": ".user_factory",
+}
+
+__all__ = list(_FACTORIES)
+
+
+def __getattr__(name):
+    if name not in _FACTORIES:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    value = getattr(importlib.import_module(_FACTORIES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from .base_factory import BaseFactory
+    from .online_meeting_factory import OnlineMeetingServicesFactory
+    from .user_factory import UserServicesFactory
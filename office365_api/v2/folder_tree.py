@@ -0,0 +1,188 @@
+import logging
+import urllib.parse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+from .consts import BATCH_MAX_REQUESTS
+from .patches import as_batch_request
+
+logger = logging.getLogger(__name__)
+
+
+class MailFolderNode(object):
+    __slots__ = ('id', 'name', 'parent', 'children', 'data')
+
+    def __init__(self, data: dict, parent: Optional['MailFolderNode'] = None):
+        self.id = data['id']
+        self.name = data.get('displayName', '')
+        self.parent = parent
+        self.children: List['MailFolderNode'] = []
+        self.data = data
+
+    @property
+    def path(self) -> str:
+        names = []
+        node = self
+        while node is not None:
+            names.append(node.name)
+            node = node.parent
+        return '/'.join(reversed(names))
+
+    def __repr__(self):
+        return '<MailFolderNode {}>'.format(self.path)
+
+
+class MailFolderTree(object):
+    """In-memory mail folder hierarchy with parent links and paths."""
+    def __init__(self):
+        self.roots: List[MailFolderNode] = []
+        self.delta_token: str | None = None
+        self._nodes: Dict[str, MailFolderNode] = {}
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __contains__(self, folder_id):
+        return folder_id in self._nodes
+
+    def __iter__(self) -> Iterator[MailFolderNode]:
+        """Breadth-first iteration over all folders."""
+        queue = deque(self.roots)
+        while queue:
+            node = queue.popleft()
+            yield node
+            queue.extend(node.children)
+
+    def get(self, folder_id) -> MailFolderNode | None:
+        return self._nodes.get(folder_id)
+
+    def find(self, path: str) -> MailFolderNode | None:
+        nodes = self.roots
+        node = None
+        for name in path.strip('/').split('/'):
+            node = next((n for n in nodes if n.name == name), None)
+            if node is None:
+                return None
+            nodes = node.children
+        return node
+
+    def add(self, data: dict, parent: MailFolderNode | None = None) -> MailFolderNode:
+        node = MailFolderNode(data, parent)
+        self._nodes[node.id] = node
+        (parent.children if parent is not None else self.roots).append(node)
+        return node
+
+    def remove(self, folder_id):
+        node = self._nodes.get(folder_id)
+        if node is None:
+            return
+        self._detach(node)
+        queue = deque([node])
+        while queue:
+            removed = queue.popleft()
+            self._nodes.pop(removed.id, None)
+            queue.extend(removed.children)
+
+    def _detach(self, node):
+        siblings = node.parent.children if node.parent is not None else self.roots
+        siblings.remove(node)
+        node.parent = None
+
+    def apply_delta(self, items: List[dict]):
+        """Apply folders returned by `MailFolderService.delta_folders`, including `@removed` entries."""
+        changed = []
+        for item in items:
+            if '@removed' in item:
+                self.remove(item['id'])
+                continue
+            node = self._nodes.get(item['id'])
+            if node is None:
+                node = self.add(item)
+            else:
+                node.name = item.get('displayName', node.name)
+                node.data.update(item)
+            changed.append(node)
+        # link in a second pass, a child may be listed before its parent
+        for node in changed:
+            parent = self._nodes.get(node.data.get('parentFolderId'))
+            if parent is not node.parent and node.id in self._nodes:
+                self._detach(node)
+                node.parent = parent
+                (parent.children if parent is not None else self.roots).append(node)
+
+
+class MailFolderTreeCrawler(object):
+    """
+    Build the folder hierarchy of a mailbox breadth-first.
+
+    The child folders of every folder of a level are listed through $batch,
+    with up to `max_workers` batches and next link follow-ups running at once.
+    Folders reporting `childFolderCount == 0` are not listed at all.
+    """
+    def __init__(self, mailfolder_service, max_workers: int = 4, max_entries: int = 100):
+        self.service = mailfolder_service
+        self.max_workers = max_workers
+        self.max_entries = max_entries
+
+    def crawl(self) -> MailFolderTree:
+        tree = MailFolderTree()
+        level = [tree.add(folder) for folder in self._list_all(*self.service.list(max_entries=self.max_entries))]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while level:
+                parents = [node for node in level if node.data.get('childFolderCount', 1) > 0]
+                chunks = [parents[i:i + BATCH_MAX_REQUESTS] for i in range(0, len(parents), BATCH_MAX_REQUESTS)]
+                level = []
+                for parent, folders in self._list_children(executor, chunks):
+                    level.extend(tree.add(folder, parent) for folder in folders)
+        return tree
+
+    def refresh(self, tree: MailFolderTree) -> MailFolderTree:
+        """
+        Bring the tree up to date with the mailFolders delta query.
+
+        The first refresh of a tree pages through every folder to obtain a
+        delta token, the following ones only transfer changes.
+        """
+        resp, next_link = self.service.delta_folders(tree.delta_token, max_entries=self.max_entries)
+        while True:
+            tree.apply_delta(resp.get('value', []))
+            if not next_link:
+                break
+            resp, next_link = self.service.follow_next_link(next_link, max_entries=self.max_entries)
+        delta_link = resp.get('@odata.deltaLink', '')
+        delta_link_qs = urllib.parse.parse_qs(urllib.parse.urlparse(delta_link).query)
+        delta_token = delta_link_qs.get('$deltatoken') or delta_link_qs.get('$deltaToken')
+        if delta_token:
+            tree.delta_token = delta_token[0]
+        return tree
+
+    def _list_all(self, resp, next_link):
+        folders = list(resp.get('value', []))
+        while next_link:
+            resp, next_link = self.service.follow_next_link(next_link, max_entries=self.max_entries)
+            folders.extend(resp.get('value', []))
+        return folders
+
+    def _list_children(self, executor, chunks):
+        batch_service = as_batch_request(self.service)
+
+        def run(chunk):
+            batch = self.service.client.new_batch_request(beta=self.service.graph_api_version == 'beta')
+            results = []
+            for parent in chunk:
+                def callback(request_id, body, exception, parent=parent):
+                    results.append((parent, body, exception))
+                request, _ = batch_service.list_childfolders(parent.id, max_entries=self.max_entries)
+                batch.add(request, callback)
+            batch.execute()
+            return results
+
+        pages = [result for results in executor.map(run, chunks) for result in results]
+        for parent, _, exception in pages:
+            if exception is not None:
+                logger.error('Unable to list child folders of %s', parent.path)
+                raise exception
+        futures = [executor.submit(self._list_all, body, body.get('@odata.nextLink')) for _, body, _ in pages]
+        for (parent, _, _), future in zip(pages, futures):
+            yield parent, future.result()
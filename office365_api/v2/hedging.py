@@ -0,0 +1,155 @@
+"""
+Hedged single-entity reads, cutting the tail latency of idempotent GETs.
+
+    hedging = HedgingPolicy(endpoints=('events.get', 'contacts.get', 'mailbox_settings.get'))
+    client = MicrosoftGraphClient(session, hedging=hedging)
+
+When a request hasn't answered after a delay learned from the recent
+latencies of its endpoint (by default their 95th percentile), a second copy
+is sent and the first answer wins. A request already running can't be
+interrupted, the answer of the loser is dropped when it arrives. Copies run
+on a pool of `max_workers` threads; when it has no room for a hedge, the
+request is sent from the calling thread without one. Hedges are paid from a token
+budget, earned at `budget` tokens per request, which caps them to that
+fraction of the traffic.
+"""
+import collections
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+class HedgingPolicy(object):
+    def __init__(self, endpoints: Iterable[str] | None = None, percentile: float = 0.95, budget: float = 0.05,
+                 initial_delay: float = 1.0, min_delay: float = 0.05, max_delay: float = 5.0,
+                 window: int = 512, min_samples: int = 20, max_workers: int = 32):
+        # endpoint names to hedge, every idempotent GET when None
+        self.endpoints = frozenset(endpoints) if endpoints is not None else None
+        self.percentile = percentile
+        self.budget = budget
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.window = window
+        self.min_samples = min_samples
+        self.max_workers = max_workers
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._delays: Dict[str, float] = {}
+        self._samples: Dict[str, int] = {}
+        # a little credit so that the first slow requests can be hedged
+        self._tokens = 1.0
+        self._lock = threading.Lock()
+        self._executor = None
+        # workers running or reserved for a copy
+        self._busy = 0
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def applies(self, endpoint) -> bool:
+        return endpoint is not None and endpoint.idempotent and endpoint.method == 'get' and \
+            (self.endpoints is None or endpoint.name in self.endpoints)
+
+    def delay(self, key: str) -> float:
+        """Time to wait for an answer before sending a second copy."""
+        return self._delays.get(key, self.initial_delay)
+
+    def record(self, key: str, seconds: float):
+        with self._lock:
+            latencies = self._latencies.get(key)
+            if latencies is None:
+                latencies = self._latencies[key] = collections.deque(maxlen=self.window)
+            latencies.append(seconds)
+            samples = self._samples[key] = self._samples.get(key, 0) + 1
+            # the percentile is refreshed every few samples of the endpoint, not on every request
+            if len(latencies) >= self.min_samples and samples % 8 == 0:
+                ordered = sorted(latencies)
+                value = ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile))]
+                self._delays[key] = min(self.max_delay, max(self.min_delay, value))
+
+    def _take_token(self) -> bool:
+        """Pay for a hedge, when the budget and a free worker allow it."""
+        with self._lock:
+            if self._tokens < 1 or self._busy >= self.max_workers:
+                return False
+            self._tokens -= 1
+            self._busy += 1
+            self.hedged += 1
+            return True
+
+    def _release(self):
+        with self._lock:
+            self._busy -= 1
+
+    def _submit(self, key, call, record=False):
+        """Run `call` on a worker reserved by the caller."""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='hedging')
+        # each copy runs in its own copy of the context, e.g. to keep the request priority
+        context = contextvars.copy_context()
+
+        def job():
+            start = time.monotonic()
+            try:
+                result = context.run(call)
+            finally:
+                self._release()
+            if record:
+                # measured from the actual start of the call, the latency of
+                # the first copy is recorded even when the hedge wins
+                self.record(key, time.monotonic() - start)
+            return result
+        return self._executor.submit(job)
+
+    def run(self, key: str, call: Callable):
+        """Result of `call()`, sent a second time if the first copy is slow."""
+        with self._lock:
+            self.requests += 1
+            self._tokens = min(10.0, self._tokens + self.budget)
+            # a hedge needs a second free worker
+            inline = self._busy + 2 > self.max_workers
+            if not inline:
+                self._busy += 1
+        if inline:
+            # every worker is busy, hedging would only queue more work
+            start = time.monotonic()
+            result = call()
+            self.record(key, time.monotonic() - start)
+            return result
+        primary = self._submit(key, call, record=True)
+        done, _ = wait([primary], timeout=self.delay(key))
+        if done or not self._take_token():
+            return primary.result()
+        logger.debug('Hedging %s after %.3fs', key, self.delay(key))
+        hedge = self._submit(key, call)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=lambda f: f is not primary):
+                if future.exception() is None:
+                    for loser in pending:
+                        if loser.cancel():
+                            self._release()
+                    if future is hedge:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return future.result()
+                error = error or future.exception()
+        raise error
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'requests': self.requests, 'hedged': self.hedged, 'hedge_wins': self.hedge_wins,
+                    'delays': dict(self._delays)}
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
@@ -0,0 +1,198 @@
+"""
+Compact index of Graph item ids.
+
+Ids are mapped to dense integer handles (0, 1, 2, ...) that stay stable for
+the life of the index, so sync state can be kept in arrays or columns keyed
+by handle instead of dicts keyed by 150 byte strings. Ids are stored once,
+base64 decoded when possible, in a single byte buffer with an open
+addressing hash table of handles on top:
+
+    index = IdIndex()
+    for page in service.iter_pages(*service.delta_list(folder_id), index=index):
+        ...
+    index.save('messages.idx')
+"""
+import base64
+import binascii
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from typing import Iterator, List, Tuple
+
+_EMPTY = -1
+_BASE64 = 1
+_REMOVED = 2
+
+_MAGIC = b'O365IDX1'
+_HEADER = struct.Struct('<8sQQQ')
+
+
+def _encode(item_id: str) -> Tuple[bytes, int]:
+    try:
+        raw = base64.urlsafe_b64decode(item_id)
+        if base64.urlsafe_b64encode(raw).decode('ascii') == item_id:
+            return raw, _BASE64
+    except (ValueError, binascii.Error):
+        pass
+    return item_id.encode('utf-8'), 0
+
+
+class IdIndex(object):
+    def __init__(self, capacity: int = 1024):
+        self._blob = bytearray()
+        self._offsets = array('Q', [0])
+        self._hashes = array('I')
+        self._flags = bytearray()
+        self._live = 0
+        self._allocate_table(capacity)
+
+    def _allocate_table(self, capacity):
+        # power of two size keeping the load factor under 0.7
+        size = 8
+        while size * 7 < capacity * 10:
+            size *= 2
+        self._table = array('i', [_EMPTY]) * size
+        self._mask = size - 1
+        for handle, h in enumerate(self._hashes):
+            slot = h & self._mask
+            while self._table[slot] != _EMPTY:
+                slot = (slot + 1) & self._mask
+            self._table[slot] = handle
+
+    def _find(self, key, kind, h) -> Tuple[int, int]:
+        """Slot of the key in the table and its handle, or the free slot and -1."""
+        table, mask = self._table, self._mask
+        slot = h & mask
+        while True:
+            handle = table[slot]
+            if handle == _EMPTY:
+                return slot, _EMPTY
+            if self._hashes[handle] == h and self._flags[handle] & _BASE64 == kind and \
+                    self._blob[self._offsets[handle]:self._offsets[handle + 1]] == key:
+                return slot, handle
+            slot = (slot + 1) & mask
+
+    def _lookup(self, item_id) -> int:
+        key, kind = _encode(item_id)
+        return self._find(key, kind, zlib.crc32(key))[1]
+
+    def add(self, item_id: str) -> int:
+        """Handle of the id, added or revived from a tombstone when needed."""
+        key, kind = _encode(item_id)
+        h = zlib.crc32(key)
+        slot, handle = self._find(key, kind, h)
+        if handle != _EMPTY:
+            if self._flags[handle] & _REMOVED:
+                self._flags[handle] &= ~_REMOVED
+                self._live += 1
+            return handle
+        handle = len(self._hashes)
+        self._blob += key
+        self._offsets.append(len(self._blob))
+        self._hashes.append(h)
+        self._flags.append(kind)
+        self._table[slot] = handle
+        self._live += 1
+        if len(self._hashes) * 10 > len(self._table) * 7:
+            self._allocate_table(len(self._hashes) * 2)
+        return handle
+
+    def get(self, item_id: str, default=None):
+        """Handle of a live id."""
+        handle = self._lookup(item_id)
+        if handle == _EMPTY or self._flags[handle] & _REMOVED:
+            return default
+        return handle
+
+    def remove(self, item_id: str):
+        """Tombstone the id; its handle is kept and reused if the id comes back. Returns the handle."""
+        handle = self._lookup(item_id)
+        if handle == _EMPTY:
+            return None
+        if not self._flags[handle] & _REMOVED:
+            self._flags[handle] |= _REMOVED
+            self._live -= 1
+        return handle
+
+    def is_removed(self, handle: int) -> bool:
+        return bool(self._flags[handle] & _REMOVED)
+
+    def id_of(self, handle: int) -> str:
+        raw = bytes(self._blob[self._offsets[handle]:self._offsets[handle + 1]])
+        if self._flags[handle] & _BASE64:
+            return base64.urlsafe_b64encode(raw).decode('ascii')
+        return raw.decode('utf-8')
+
+    def __contains__(self, item_id) -> bool:
+        return self.get(item_id) is not None
+
+    def __len__(self) -> int:
+        return self._live
+
+    def __iter__(self) -> Iterator[str]:
+        for handle in range(len(self._hashes)):
+            if not self._flags[handle] & _REMOVED:
+                yield self.id_of(handle)
+
+    @property
+    def handles(self) -> int:
+        """Number of handles ever given, tombstones included."""
+        return len(self._hashes)
+
+    def ingest(self, page: dict) -> Tuple[List[int], List[int]]:
+        """
+        Add the items of a list or delta page, tombstoning `@removed` ones.
+        Returns the handles of the added/updated and of the removed items.
+        """
+        added, removed = [], []
+        for item in page.get('value', []):
+            if '@removed' in item:
+                handle = self.remove(item['id'])
+                if handle is not None:
+                    removed.append(handle)
+            else:
+                added.append(self.add(item['id']))
+        return added, removed
+
+    def save(self, path: str):
+        """Write a snapshot, atomically replacing `path`."""
+        offsets, hashes = self._offsets, self._hashes
+        if sys.byteorder == 'big':
+            offsets, hashes = array('Q', offsets), array('I', hashes)
+            offsets.byteswap()
+            hashes.byteswap()
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_HEADER.pack(_MAGIC, len(self._hashes), len(self._blob), self._live))
+                offsets.tofile(f)
+                hashes.tofile(f)
+                f.write(self._flags)
+                f.write(self._blob)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> 'IdIndex':
+        index = cls.__new__(cls)
+        with open(path, 'rb') as f:
+            magic, count, blob_size, live = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC:
+                raise ValueError('{} is not an id index snapshot'.format(path))
+            index._offsets = array('Q')
+            index._offsets.fromfile(f, count + 1)
+            index._hashes = array('I')
+            index._hashes.fromfile(f, count)
+            index._flags = bytearray(f.read(count))
+            index._blob = bytearray(f.read(blob_size))
+        if sys.byteorder == 'big':
+            index._offsets.byteswap()
+            index._hashes.byteswap()
+        index._live = live
+        index._allocate_table(count)
+        return index
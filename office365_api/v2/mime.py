@@ -0,0 +1,246 @@
+"""
+Incremental MIME parsing of raw message downloads.
+
+Headers are available as soon as they are downloaded and parts are streamed
+one by one, so the full message tree is never held in memory:
+
+    message = client.me.message.stream_raw(message_id)
+    subject = message.headers['Subject']
+    for part in message.iter_parts():
+        if part.filename:
+            part.save(os.path.join(target, part.filename))
+        # parts that are not consumed are skipped
+"""
+import base64
+import binascii
+import email.policy
+from email.message import EmailMessage
+from email.parser import BytesHeaderParser
+from typing import Iterable, Iterator, List
+
+from .consts import STREAM_CHUNK_SIZE
+
+MAX_LINE_LENGTH = 64 * 1024
+
+
+class _LineReader(object):
+    def __init__(self, chunks: Iterable[bytes], max_line_length: int = MAX_LINE_LENGTH):
+        self._chunks = iter(chunks)
+        self._buffer = bytearray()
+        self._pos = 0
+        self._eof = False
+        self.max_line_length = max_line_length
+
+    def readline(self) -> bytes:
+        """Return the next line including its line break, long lines are returned in pieces."""
+        while True:
+            end = self._buffer.find(b'\n', self._pos)
+            if end != -1:
+                end += 1
+                break
+            if self._eof or len(self._buffer) - self._pos >= self.max_line_length:
+                end = min(len(self._buffer), self._pos + self.max_line_length)
+                break
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                self._eof = True
+                continue
+            if self._pos:
+                del self._buffer[:self._pos]
+                self._pos = 0
+            self._buffer += chunk
+        line = bytes(self._buffer[self._pos:end])
+        self._pos = end
+        return line
+
+
+class _Base64Decoder(object):
+    def __init__(self):
+        self._rest = b''
+
+    def decode(self, data):
+        data = self._rest + b''.join(data.split())
+        cut = len(data) - len(data) % 4
+        self._rest = data[cut:]
+        return base64.b64decode(data[:cut])
+
+    def flush(self):
+        return base64.b64decode(self._rest + b'=' * (-len(self._rest) % 4)) if self._rest else b''
+
+
+class _QuotedPrintableDecoder(object):
+    def __init__(self):
+        self._rest = b''
+
+    def decode(self, data):
+        data = self._rest + data
+        cut = data.rfind(b'\n') + 1
+        self._rest = data[cut:]
+        return binascii.a2b_qp(data[:cut])
+
+    def flush(self):
+        return binascii.a2b_qp(self._rest) if self._rest else b''
+
+
+class MimePart(object):
+    """A leaf part of a streamed message. Its content can be read once, in order."""
+    def __init__(self, headers: EmailMessage, body: Iterator[bytes]):
+        self.headers = headers
+        self._body = body
+        self._consumed = False
+        self._done = False
+        self._terminator = None
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get_content_type()
+
+    @property
+    def filename(self) -> str | None:
+        return self.headers.get_filename()
+
+    @property
+    def is_attachment(self) -> bool:
+        return self.headers.get_content_disposition() == 'attachment'
+
+    def iter_content(self, decode: bool = True) -> Iterator[bytes]:
+        """Yield the content of the part, undoing base64 and quoted-printable transfer encodings."""
+        if self._consumed:
+            raise ValueError('The content of a streamed part can only be read once')
+        self._consumed = True
+        encoding = (self.headers.get('Content-Transfer-Encoding') or '').strip().lower()
+        decoder = None
+        if decode and encoding == 'base64':
+            decoder = _Base64Decoder()
+        elif decode and encoding == 'quoted-printable':
+            decoder = _QuotedPrintableDecoder()
+        while True:
+            try:
+                chunk = next(self._body)
+            except StopIteration as e:
+                self._done = True
+                self._terminator = e.value
+                break
+            if decoder is not None:
+                chunk = decoder.decode(chunk)
+            if chunk:
+                yield chunk
+        if decoder is not None:
+            rest = decoder.flush()
+            if rest:
+                yield rest
+
+    def read(self, decode: bool = True) -> bytes:
+        return b''.join(self.iter_content(decode))
+
+    def save(self, path: str, decode: bool = True):
+        with open(path, 'wb') as f:
+            for chunk in self.iter_content(decode):
+                f.write(chunk)
+
+    def _finish(self):
+        # drain whatever the caller did not read
+        self._consumed = True
+        while not self._done:
+            try:
+                next(self._body)
+            except StopIteration as e:
+                self._done = True
+                self._terminator = e.value
+        return self._terminator
+
+
+class StreamingMimeMessage(object):
+    """Parse a MIME message from an iterable of byte chunks, reading it only as far as needed."""
+    def __init__(self, chunks: Iterable[bytes], chunk_size: int = STREAM_CHUNK_SIZE):
+        self._reader = _LineReader(chunks)
+        self._chunk_size = chunk_size
+        self._started = False
+        self.headers = self._read_headers()
+
+    def iter_parts(self) -> Iterator[MimePart]:
+        """
+        Yield the leaf parts depth-first; nested multiparts are flattened.
+
+        Attached messages (message/rfc822) are leaves, their content can be
+        parsed with another `StreamingMimeMessage(part.iter_content())`.
+        """
+        if self._started:
+            raise ValueError('The parts of a streamed message can only be iterated once')
+        self._started = True
+        yield from self._walk(self.headers, [])
+
+    def _read_headers(self) -> EmailMessage:
+        lines = []
+        while True:
+            line = self._reader.readline()
+            if not line or line in (b'\r\n', b'\n'):
+                break
+            lines.append(line)
+        return BytesHeaderParser(policy=email.policy.default).parsebytes(b''.join(lines))
+
+    def _walk(self, headers, boundaries: List[bytes]):
+        boundary = headers.get_boundary() if headers.get_content_maintype() == 'multipart' else None
+        if not boundary:
+            part = MimePart(headers, self._scan(boundaries, emit=True))
+            yield part
+            return part._finish()
+        boundary = boundary.encode('utf-8')
+        stack = boundaries + [boundary]
+        terminator = yield from self._scan(stack, emit=False)
+        while terminator == (boundary, False):
+            terminator = yield from self._walk(self._read_headers(), stack)
+        if terminator == (boundary, True):
+            # skip the epilogue up to the next delimiter of an enclosing multipart
+            terminator = yield from self._scan(boundaries, emit=False)
+        return terminator
+
+    @staticmethod
+    def _match(line, boundaries):
+        line = line.rstrip(b'\r\n').rstrip(b' \t')
+        for boundary in reversed(boundaries):
+            if line == b'--' + boundary:
+                return boundary, False
+            if line == b'--' + boundary + b'--':
+                return boundary, True
+        return None
+
+    def _scan(self, boundaries, emit):
+        """
+        Read body lines up to the next delimiter of `boundaries`, yielding them
+        when `emit` is set. Returns the delimiter as `(boundary, is_closing)`.
+        """
+        buffer = bytearray()
+        # the line break before a delimiter belongs to the delimiter
+        pending = b''
+        at_line_start = True
+        while True:
+            line = self._reader.readline()
+            if not line:
+                terminator = None
+                break
+            if at_line_start and line.startswith(b'--') and boundaries:
+                terminator = self._match(line, boundaries)
+                if terminator is not None:
+                    break
+            if line.endswith(b'\r\n'):
+                content, newline = line[:-2], b'\r\n'
+            elif line.endswith(b'\n'):
+                content, newline = line[:-1], b'\n'
+            else:
+                content, newline = line, b''
+            at_line_start = bool(newline)
+            if emit:
+                buffer += pending
+                buffer += content
+                if len(buffer) >= self._chunk_size:
+                    yield bytes(buffer)
+                    buffer.clear()
+            pending = newline
+        if emit:
+            if terminator is None:
+                buffer += pending
+            if buffer:
+                yield bytes(buffer)
+        return terminator
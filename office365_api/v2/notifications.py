@@ -0,0 +1,316 @@
+"""
+Receiver side of Microsoft Graph change notifications.
+
+See: https://learn.microsoft.com/en-us/graph/change-notifications-delivery-webhooks
+"""
+import asyncio
+import base64
+import hmac
+import json
+import logging
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .consts import BATCH_MAX_REQUESTS
+from .exceptions import Office365ClientError, Office365ServerError
+
+logger = logging.getLogger(__name__)
+
+
+def _decrypt_data(encrypted_content: dict, symmetric_key: bytes) -> dict:
+    from cryptography.hazmat.primitives import padding
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+    data = base64.b64decode(encrypted_content['data'])
+    signature = hmac.new(symmetric_key, data, 'sha256').digest()
+    if not hmac.compare_digest(signature, base64.b64decode(encrypted_content['dataSignature'])):
+        raise ValueError('Encrypted resource data signature mismatch')
+    decryptor = Cipher(algorithms.AES(symmetric_key), modes.CBC(symmetric_key[:16])).decryptor()
+    unpadder = padding.PKCS7(128).unpadder()
+    plain = unpadder.update(decryptor.update(data) + decryptor.finalize()) + unpadder.finalize()
+    return json.loads(plain)
+
+
+class NotificationDecryptor(object):
+    """
+    Decrypt rich notifications in bulk.
+
+    Private keys are parsed once and looked up by `encryptionCertificateId`, so
+    certificates can be rotated without restarting the receiver.
+    """
+    def __init__(self, private_keys: Dict[str, bytes], password: bytes | None = None):
+        try:
+            import cryptography  # noqa: F401
+        except ImportError as e:
+            raise ImportError('NotificationDecryptor requires the cryptography package, '
+                              'install office365-rest-client[notifications]') from e
+        self._pem_keys = dict(private_keys)
+        self._password = password
+        self._keys: Dict[str, Any] = {}
+
+    def _get_key(self, certificate_id):
+        key = self._keys.get(certificate_id)
+        if key is None:
+            from cryptography.hazmat.primitives.serialization import load_pem_private_key
+            key = load_pem_private_key(self._pem_keys[certificate_id], password=self._password)
+            self._keys[certificate_id] = key
+        return key
+
+    def decrypt_all(self, notifications: Iterable[dict]) -> List[dict]:
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.asymmetric import padding as asym_padding
+
+        oaep = asym_padding.OAEP(mgf=asym_padding.MGF1(algorithm=hashes.SHA1()), algorithm=hashes.SHA1(), label=None)
+        # RSA is the expensive part, a data key shared by several notifications is decrypted once
+        symmetric_keys: Dict[tuple, bytes] = {}
+        result = []
+        for notification in notifications:
+            encrypted_content = notification.get('encryptedContent')
+            if encrypted_content:
+                certificate_id = encrypted_content.get('encryptionCertificateId')
+                try:
+                    cache_key = (certificate_id, encrypted_content['dataKey'])
+                    symmetric_key = symmetric_keys.get(cache_key)
+                    if symmetric_key is None:
+                        symmetric_key = self._get_key(certificate_id).decrypt(
+                            base64.b64decode(encrypted_content['dataKey']), oaep)
+                        symmetric_keys[cache_key] = symmetric_key
+                    notification['resourceData'] = _decrypt_data(encrypted_content, symmetric_key)
+                except Exception as e:
+                    logger.error('Unable to decrypt notification for %s: %s', notification.get('resource'), e)
+                    continue
+            result.append(notification)
+        return result
+
+
+def change_identity(notification: dict):
+    """
+    What tells two changes of a resource apart: the etag of its resource
+    data when there is one, else the signature of its encrypted content.
+    """
+    resource_data = notification.get('resourceData') or {}
+    identity = resource_data.get('@odata.etag') or resource_data.get('etag')
+    if identity is None:
+        identity = (notification.get('encryptedContent') or {}).get('dataSignature')
+    return identity
+
+
+class NotificationDeduplicator(object):
+    """
+    Drop notifications repeating a change already seen within `window`
+    seconds: same resource, change type and etag. Notifications without an
+    etag are never dropped, the pipeline coalesces them while their fetch
+    is pending instead.
+    """
+    def __init__(self, window: float = 30.0, max_size: int = 100000):
+        self.window = window
+        self.max_size = max_size
+        self._seen: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_duplicate(self, notification: dict) -> bool:
+        identity = change_identity(notification)
+        if identity is None:
+            return False
+        key = (notification.get('resource'), notification.get('changeType'), identity)
+        now = time.monotonic()
+        with self._lock:
+            while self._seen:
+                oldest_key, seen_at = next(iter(self._seen.items()))
+                if now - seen_at < self.window and len(self._seen) < self.max_size:
+                    break
+                del self._seen[oldest_key]
+            if key in self._seen:
+                return True
+            self._seen[key] = now
+            return False
+
+
+class NotificationPipeline(object):
+    """
+    Validate, decrypt and deduplicate incoming notifications, then fetch the
+    changed resources with as few $batch calls as possible.
+
+    `on_resource(notification, resource, exception)` is called for every
+    accepted notification. Notifications carrying decrypted resource data and
+    deletions are passed through without a follow-up fetch.
+    """
+    def __init__(self, client, on_resource: Callable[[dict, Optional[dict], Optional[Exception]], None],
+                 client_state: str | None = None, decryptor: NotificationDecryptor | None = None,
+                 dedup_window: float = 30.0, flush_interval: float = 0.5, beta: bool = False):
+        self.client = client
+        self.on_resource = on_resource
+        self.client_state = client_state
+        self.decryptor = decryptor
+        self.deduplicator = NotificationDeduplicator(dedup_window) if dedup_window else None
+        self.flush_interval = flush_interval
+        self.beta = beta
+        self._pending: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._worker = None
+
+    def is_valid_client_state(self, notification: dict) -> bool:
+        if self.client_state is None:
+            return True
+        received = notification.get('clientState') or ''
+        return hmac.compare_digest(received.encode('utf-8'), self.client_state.encode('utf-8'))
+
+    def submit(self, notifications: Iterable[dict]) -> int:
+        """Accept a notification payload; returns the number of notifications queued or delivered."""
+        accepted = []
+        for notification in notifications:
+            if not self.is_valid_client_state(notification):
+                logger.warning('Dropping notification with invalid clientState for %s', notification.get('resource'))
+                continue
+            accepted.append(notification)
+        if self.decryptor is not None:
+            accepted = self.decryptor.decrypt_all(accepted)
+        if self.deduplicator is not None:
+            # after decryption, rich notifications only carry their etag in the decrypted resource data
+            accepted = [n for n in accepted if not self.deduplicator.is_duplicate(n)]
+        with self._lock:
+            for notification in accepted:
+                if self._needs_fetch(notification):
+                    self._pending.setdefault(notification.get('resource'), []).append(notification)
+            pending_count = len(self._pending)
+        for notification in accepted:
+            if self._has_resource_data(notification):
+                self.on_resource(notification, notification.get('resourceData'), None)
+            elif notification.get('changeType') == 'deleted':
+                self.on_resource(notification, None, None)
+        if self._worker is None:
+            self.flush()
+        elif pending_count >= BATCH_MAX_REQUESTS:
+            self._wakeup.set()
+        return len(accepted)
+
+    def _has_resource_data(self, notification):
+        return self.decryptor is not None and 'encryptedContent' in notification
+
+    def _needs_fetch(self, notification):
+        return not self._has_resource_data(notification) and notification.get('changeType') != 'deleted'
+
+    def flush(self):
+        """Fetch every pending resource using $batch, 20 resources per call."""
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+                chunk = []
+                while self._pending and len(chunk) < BATCH_MAX_REQUESTS:
+                    chunk.append(self._pending.popitem(last=False))
+            self._fetch(chunk)
+
+    def _fetch(self, chunk):
+        batch = self.client.new_batch_request(beta=self.beta)
+        for resource, notifications in chunk:
+            def callback(request_id, body, exception, notifications=notifications):
+                for notification in notifications:
+                    self.on_resource(notification, body if exception is None else None, exception)
+            batch.add({'method': 'GET', 'url': '/' + resource.lstrip('/')}, callback)
+        try:
+            batch.execute()
+        except (Office365ClientError, Office365ServerError) as e:
+            logger.warning('Fetching %s notified resources failed: %s', len(chunk), e)
+            for _, notifications in chunk:
+                for notification in notifications:
+                    self.on_resource(notification, None, e)
+
+    def start(self):
+        """Flush pending fetches from a background thread every `flush_interval` seconds."""
+        if self._worker is None:
+            self._closed = False
+            self._worker = threading.Thread(target=self._run, name='graph-notifications', daemon=True)
+            self._worker.start()
+
+    def close(self):
+        self._closed = True
+        self._wakeup.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+        self.flush()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Failed to fetch notified resources')
+
+
+class NotificationHandler(object):
+    """
+    Webhook endpoint for change notifications, mountable as a WSGI app or,
+    through `asgi`, as an ASGI app.
+
+    Answers `validationToken` handshakes and hands notification payloads to
+    the pipeline. Graph expects an answer within a few seconds, so call
+    `pipeline.start()` to move the follow-up fetches off the request path.
+    """
+    def __init__(self, pipeline: NotificationPipeline, max_body_size: int = 4 * 1024 * 1024):
+        self.pipeline = pipeline
+        self.max_body_size = max_body_size
+
+    def handle(self, method: str, query_string: str, body: bytes):
+        """Return a `(status, headers, body)` tuple for the given request."""
+        validation_token = urllib.parse.parse_qs(query_string).get('validationToken')
+        if validation_token:
+            return '200 OK', [('Content-Type', 'text/plain')], validation_token[0].encode('utf-8')
+        if method.upper() != 'POST':
+            return '405 Method Not Allowed', [('Allow', 'POST')], b''
+        try:
+            notifications = json.loads(body)['value']
+        except (ValueError, KeyError, TypeError):
+            return '400 Bad Request', [], b''
+        self.pipeline.submit(notifications)
+        return '202 Accepted', [], b''
+
+    def __call__(self, environ, start_response):
+        try:
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        if length > self.max_body_size:
+            start_response('413 Payload Too Large', [])
+            return [b'']
+        body = environ['wsgi.input'].read(length) if length else b''
+        status, headers, content = self.handle(environ.get('REQUEST_METHOD', 'GET'), environ.get('QUERY_STRING', ''), body)
+        start_response(status, headers)
+        return [content]
+
+    async def asgi(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            chunks.append(message.get('body', b''))
+            size += len(chunks[-1])
+            if size > self.max_body_size:
+                await self._send_asgi(send, '413 Payload Too Large', [], b'')
+                return
+            if not message.get('more_body'):
+                break
+        query_string = scope.get('query_string', b'').decode('latin-1')
+        loop = asyncio.get_running_loop()
+        status, headers, content = await loop.run_in_executor(
+            None, self.handle, scope['method'], query_string, b''.join(chunks))
+        await self._send_asgi(send, status, headers, content)
+
+    @staticmethod
+    async def _send_asgi(send, status, headers, content):
+        await send({
+            'type': 'http.response.start',
+            'status': int(status.split(' ', 1)[0]),
+            'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers],
+        })
+        await send({'type': 'http.response.body', 'body': content})
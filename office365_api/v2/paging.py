@@ -0,0 +1,145 @@
+"""
+Page sizes tuned from observed latency, payload size and server timeouts.
+
+    sizer = AdaptivePageSizer()
+    service = client.users(user_id).message
+    for page in sizer.iter_pages(service, lambda size: service.list(max_entries=size)):
+        ...
+
+Sizes are learned per key, by default the service class and its prefix
+(i.e. the endpoint and the mailbox): a page that times out is fetched again
+with a smaller size, fast pages make the next ones bigger.
+"""
+import json
+import logging
+import re
+import threading
+import time
+from typing import Callable, Dict, Hashable, Iterator, Tuple
+
+from .consts import DEFAULT_MAX_ENTRIES
+from .exceptions import Office365ServerError
+
+logger = logging.getLogger(__name__)
+
+# next links usually carry the percent-encoded form, %24top=
+_TOP_RE = re.compile(r'([?&](?:\$|%24)top=)\d+', re.IGNORECASE)
+
+
+def is_timeout(e: Exception) -> bool:
+    if isinstance(e, Office365ServerError):
+        return e.is_response_timeout or e.status_code == 504
+    from requests.exceptions import Timeout
+    return isinstance(e, Timeout)
+
+
+def with_page_size(next_link: str, size: int) -> str:
+    """Next link asking for `size` items; `$skip` offsets are absolute so changing `$top` is safe."""
+    return _TOP_RE.sub(lambda m: m.group(1) + str(size), next_link)
+
+
+def _estimate_bytes(page: dict, samples: int = 3) -> int:
+    items = page.get('value', [])
+    if not items:
+        return 0
+    sampled = items[:samples]
+    return len(json.dumps(sampled)) * len(items) // len(sampled)
+
+
+class _PageState(object):
+    __slots__ = ('size', 'latency', 'ceiling')
+
+    def __init__(self, size):
+        self.size = float(size)
+        self.latency = None
+        # smallest size that timed out, probed again slowly
+        self.ceiling = float('inf')
+
+
+class AdaptivePageSizer(object):
+    """
+    Multiplicatively grow page sizes while pages come back well within
+    `target_latency` and under `max_bytes`, shrink them proportionally when
+    they are slower or bigger, and halve them on timeouts. Sizes that timed
+    out are only approached again slowly.
+    """
+    def __init__(self, initial: int = DEFAULT_MAX_ENTRIES, min_size: int = 10, max_size: int = 1000,
+                 target_latency: float = 2.0, max_bytes: int = 4 * 1024 * 1024, grow_factor: float = 1.5,
+                 max_retries: int = 3):
+        self.initial = initial
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_latency = target_latency
+        self.max_bytes = max_bytes
+        self.grow_factor = grow_factor
+        self.max_retries = max_retries
+        self._states: Dict[Hashable, _PageState] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, key) -> _PageState:
+        state = self._states.get(key)
+        if state is None:
+            state = self._states.setdefault(key, _PageState(self.initial))
+        return state
+
+    def page_size(self, key: Hashable) -> int:
+        return int(self._state(key).size)
+
+    def _clamp(self, size):
+        return min(self.max_size, max(self.min_size, size))
+
+    def record(self, key: Hashable, requested: int, items: int, seconds: float, payload_bytes: int = 0):
+        with self._lock:
+            state = self._state(key)
+            state.latency = seconds if state.latency is None else 0.7 * state.latency + 0.3 * seconds
+            ratio = min(self.target_latency / max(seconds, 1e-3),
+                        self.max_bytes / payload_bytes if payload_bytes else float('inf'))
+            if ratio < 1:
+                state.size = self._clamp(requested * max(ratio, 0.5))
+            elif ratio > 2 and items >= requested:
+                # only full pages tell that a bigger one is worth asking for
+                grown = min(requested * self.grow_factor, state.ceiling * 0.9)
+                state.size = self._clamp(max(state.size, grown))
+                state.ceiling *= 1.01
+
+    def record_timeout(self, key: Hashable, requested: int):
+        with self._lock:
+            state = self._state(key)
+            state.size = self._clamp(min(state.size, requested / 2))
+            state.ceiling = min(state.ceiling, requested)
+
+    def fetch(self, key: Hashable, call: Callable[[int], Tuple[dict, str]]) -> Tuple[dict, str]:
+        """`call(size)` with the current page size, retried smaller on timeouts."""
+        for attempt in range(self.max_retries + 1):
+            size = self.page_size(key)
+            start = time.monotonic()
+            try:
+                resp, next_link = call(size)
+            except Exception as e:
+                if not is_timeout(e) or attempt == self.max_retries or size <= self.min_size:
+                    raise
+                self.record_timeout(key, size)
+                logger.warning('Page of %s items timed out for %s, retrying with %s',
+                               size, key, self.page_size(key))
+                continue
+            self.record(key, size, len(resp.get('value', [])), time.monotonic() - start, _estimate_bytes(resp))
+            return resp, next_link
+
+    def iter_pages(self, service, first_page, key: Hashable = None, fields=None) -> Iterator[dict]:
+        """
+        Pages of a list or delta call. `first_page(size)` makes the initial
+        request, or is the (resp, next_link) of a page already fetched.
+        """
+        if key is None:
+            key = (type(service).__name__, service.prefix)
+        if callable(first_page):
+            resp, next_link = self.fetch(key, first_page)
+        else:
+            resp, next_link = first_page
+        while True:
+            yield resp
+            if not next_link:
+                return
+            link = next_link
+            resp, next_link = self.fetch(key, lambda size: service.follow_next_link(
+                with_page_size(link, size), max_entries=size, fields=fields))
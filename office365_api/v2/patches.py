@@ -1,16 +1,22 @@
+import copy
 import json
+import types
 import urllib.parse
 
-def become_request(self, method, path, query_params=None, headers=None, body=None, parse_json_result=True):
+def become_request(self, method, path, query_params=None, headers=None, body=None, parse_json_result=True, set_content_type=True,
+                   endpoint=None):
     """
     Batch Request to JSON.
 
     Patches the execute_request() to not fire the http request. Instead,
     force to return a json data of the request for batch processing.
     """
+    if endpoint is not None and not endpoint.batchable:
+        raise ValueError('{} can not be sent in a batch request'.format(endpoint.name))
     default_headers = {'Content-Type': 'application/json'}
     if headers:
         default_headers.update(headers)
+    self._add_client_preferences(default_headers)
 
     request = {
         'method': method.upper(),
@@ -34,3 +40,15 @@ def become_request(self, method, path, query_params=None, headers=None, body=Non
 
     request.update({'url': url})
     return request
+
+
+def as_batch_request(service):
+    """
+    Return a copy of the service whose methods build batch requests.
+
+    `as_batch_request(client.me.event).create(**payload)` returns the request
+    dict to pass to `BatchService.add` instead of firing the http request.
+    """
+    batch_service = copy.copy(service)
+    batch_service.execute_request = types.MethodType(become_request, batch_service)
+    return batch_service
@@ -0,0 +1,323 @@
+"""
+OData query builder for the v2 list methods.
+
+Expressions quote and escape their literals, queries are immutable and can
+be defined once as templates with named parameters:
+
+    from office365_api.v2.query import F, P, Query
+
+    UNREAD_SINCE = (Query()
+                    .filter((F('isRead') == False) & (F('receivedDateTime') >= P('since')))
+                    .select('id', 'subject', 'from')
+                    .order_by('-receivedDateTime'))
+    client.me.message.list(query=UNREAD_SINCE.bind(since=since))
+
+A template is compiled to query strings once; binding values only formats
+the parameters.
+"""
+import copy
+import datetime
+import uuid
+from typing import Any, Callable, Dict, List
+
+PRIMARY = 4
+COMPARISON = 3
+AND = 2
+OR = 1
+
+
+class Param(object):
+    """Named placeholder, bound with `Query.bind` or `Query.to_params`."""
+    __slots__ = ('name',)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __repr__(self):
+        return 'P({!r})'.format(self.name)
+
+
+P = Param
+
+
+def format_literal(value) -> str:
+    """OData literal of a Python value."""
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        # naive datetimes are taken as UTC, like everywhere else in Graph
+        return value.isoformat() + 'Z'
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def quote_search(value) -> str:
+    """`$search` value, always a double quoted phrase."""
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _operand(value) -> list:
+    if isinstance(value, Param):
+        return [value]
+    if isinstance(value, Field):
+        return [value.path]
+    return [format_literal(value)]
+
+
+class Expr(object):
+    """A `$filter` expression, made of literal strings and `Param`s."""
+    __slots__ = ('parts', 'precedence')
+
+    def __init__(self, parts: list, precedence: int = PRIMARY):
+        self.parts = parts
+        self.precedence = precedence
+
+    def _wrapped(self, precedence):
+        if self.precedence < precedence:
+            return ['('] + self.parts + [')']
+        return self.parts
+
+    def __and__(self, other):
+        other = _expr(other)
+        return Expr(self._wrapped(AND) + [' and '] + other._wrapped(AND), AND)
+
+    def __or__(self, other):
+        other = _expr(other)
+        return Expr(self._wrapped(OR) + [' or '] + other._wrapped(OR), OR)
+
+    def __invert__(self):
+        return Expr(['not '] + self._wrapped(PRIMARY), COMPARISON)
+
+    def __str__(self):
+        return ''.join(p if isinstance(p, str) else '{' + p.name + '}' for p in self.parts)
+
+    def __repr__(self):
+        return '<Expr {}>'.format(self)
+
+
+def Raw(text: str) -> Expr:
+    """Expression inserted as is, e.g. for functions the builder doesn't know."""
+    return Expr([text], OR)
+
+
+def _expr(value) -> Expr:
+    if isinstance(value, Expr):
+        return value
+    if isinstance(value, str):
+        return Raw(value)
+    raise TypeError('Expected a filter expression, got {!r}'.format(value))
+
+
+class Field(object):
+    """Property path usable in expressions, `F('from/emailAddress/address') == address`."""
+    __slots__ = ('path',)
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _compare(self, operator, value):
+        return Expr([self.path + ' ' + operator + ' '] + _operand(value), COMPARISON)
+
+    def __eq__(self, value):
+        return self._compare('eq', value)
+
+    def __ne__(self, value):
+        return self._compare('ne', value)
+
+    def __gt__(self, value):
+        return self._compare('gt', value)
+
+    def __ge__(self, value):
+        return self._compare('ge', value)
+
+    def __lt__(self, value):
+        return self._compare('lt', value)
+
+    def __le__(self, value):
+        return self._compare('le', value)
+
+    __hash__ = object.__hash__
+
+    def _function(self, name, value):
+        return Expr([name + '(' + self.path + ', '] + _operand(value) + [')'])
+
+    def startswith(self, value):
+        return self._function('startswith', value)
+
+    def endswith(self, value):
+        return self._function('endswith', value)
+
+    def contains(self, value):
+        return self._function('contains', value)
+
+    def isin(self, values):
+        parts: List[Any] = [self.path + ' in (']
+        for i, value in enumerate(values):
+            if i:
+                parts.append(', ')
+            parts.extend(_operand(value))
+        return Expr(parts + [')'], COMPARISON)
+
+    def any(self, predicate: Callable[['Field'], Expr], variable: str = 'x'):
+        """Lambda over a collection, `F('categories').any(lambda c: c == 'Red')`."""
+        return Expr([self.path + '/any(' + variable + ':'] + _expr(predicate(Field(variable))).parts + [')'])
+
+    def asc(self) -> str:
+        return self.path
+
+    def desc(self) -> str:
+        return self.path + ' desc'
+
+
+F = Field
+
+
+def _render(parts, values):
+    rendered = []
+    for part in parts:
+        if isinstance(part, str):
+            rendered.append(part)
+            continue
+        name, formatter = part
+        try:
+            rendered.append(formatter(values[name]))
+        except KeyError:
+            raise ValueError('No value bound to query parameter {!r}'.format(name)) from None
+    return ''.join(rendered)
+
+
+class _CompiledQuery(object):
+    def __init__(self, options: Dict[str, list]):
+        self.static = {}
+        self.dynamic = {}
+        for option, parts in options.items():
+            merged: List[Any] = []
+            for part in parts:
+                if isinstance(part, str) and merged and isinstance(merged[-1], str):
+                    merged[-1] += part
+                else:
+                    merged.append(part)
+            if all(isinstance(part, str) for part in merged):
+                self.static[option] = ''.join(merged)
+            else:
+                self.dynamic[option] = merged
+
+    def render(self, values) -> Dict[str, Any]:
+        params = dict(self.static)
+        for option, parts in self.dynamic.items():
+            params[option] = _render(parts, values)
+        return params
+
+
+class Query(object):
+    """
+    Immutable set of OData query options, every builder method returns a
+    new query. Pass it as `query=` to the v2 list methods.
+    """
+    def __init__(self):
+        self._filter: Expr | None = None
+        self._orderby: tuple = ()
+        self._select: tuple = ()
+        self._expand: tuple = ()
+        self._top: int | Param | None = None
+        self._search: Any = None
+        self._values: Dict[str, Any] = {}
+        self._compiled: _CompiledQuery | None = None
+
+    def _replace(self, **changes):
+        query = copy.copy(self)
+        query.__dict__.update(changes)
+        query._compiled = None
+        return query
+
+    def filter(self, *expressions):
+        """AND the expressions with the current filter."""
+        result = self._filter
+        for expression in expressions:
+            expression = _expr(expression)
+            result = expression if result is None else result & expression
+        return self._replace(_filter=result)
+
+    def order_by(self, *fields):
+        """Fields, `Field.desc()` or names prefixed with `-` for a descending order."""
+        orderby = []
+        for field in fields:
+            if isinstance(field, Field):
+                field = field.asc()
+            elif field.startswith('-'):
+                field = field[1:] + ' desc'
+            orderby.append(field)
+        return self._replace(_orderby=self._orderby + tuple(orderby))
+
+    def select(self, *fields):
+        return self._replace(_select=self._select + tuple(f.path if isinstance(f, Field) else f for f in fields))
+
+    def expand(self, *relations):
+        return self._replace(_expand=self._expand + relations)
+
+    def top(self, count):
+        return self._replace(_top=count)
+
+    def search(self, text):
+        return self._replace(_search=text)
+
+    def bind(self, **values):
+        """Query with parameter values, sharing the compiled template."""
+        compiled = self._compile()
+        query = copy.copy(self)
+        query._values = dict(self._values, **values)
+        query._compiled = compiled
+        return query
+
+    def _compile(self) -> _CompiledQuery:
+        if self._compiled is None:
+            options: Dict[str, list] = {}
+            if self._filter is not None:
+                options['$filter'] = [(p.name, format_literal) if isinstance(p, Param) else p
+                                      for p in self._filter.parts]
+            if self._orderby:
+                options['$orderby'] = [','.join(self._orderby)]
+            if self._select:
+                options['$select'] = [','.join(self._select)]
+            if self._expand:
+                options['$expand'] = [','.join(self._expand)]
+            if self._top is not None:
+                options['$top'] = [(self._top.name, str) if isinstance(self._top, Param) else str(self._top)]
+            if self._search is not None:
+                options['$search'] = [(self._search.name, quote_search) if isinstance(self._search, Param)
+                                      else quote_search(self._search)]
+            self._compiled = _CompiledQuery(options)
+        return self._compiled
+
+    def to_params(self, **values) -> Dict[str, Any]:
+        """Query parameters to send, e.g. `{'$filter': "isRead eq false"}`."""
+        if values:
+            values = dict(self._values, **values)
+        else:
+            values = self._values
+        return self._compile().render(values)
+
+    def __repr__(self):
+        compiled = self._compile()
+        params = dict(compiled.static)
+        for option, parts in compiled.dynamic.items():
+            params[option] = ''.join(p if isinstance(p, str) else '{' + p[0] + '}' for p in parts)
+        return '<Query {}>'.format(params)
+
+
+def apply_query(query_params, query: Query | None):
+    """Merge the options of `query` into the query parameters of a request."""
+    if query is None:
+        return query_params
+    query_params = dict(query_params or {})
+    query_params.update(query.to_params())
+    return query_params
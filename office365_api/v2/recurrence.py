@@ -0,0 +1,259 @@
+"""
+Local expansion of recurring events.
+
+Instead of syncing every occurrence through calendarView, series masters are
+synced together with their exceptions and cancelled occurrences, and the
+occurrences of a window are generated from their `recurrence`:
+
+    service = client.users(user_id).event_beta
+    for page in service.iter_pages(*service.list_with_exceptions()):
+        for occurrence in expand_events(page['value'], window_start, window_end):
+            ...
+
+Occurrences are generated lazily and in order, in the time zone of the
+recurrence so that they keep their wall clock time across DST changes.
+"""
+import calendar
+import datetime
+import heapq
+import logging
+import re
+from typing import Iterable, Iterator
+
+from .timezones import resolve_timezone
+
+logger = logging.getLogger(__name__)
+
+UTC = datetime.timezone.utc
+
+DAYS_OF_WEEK = {
+    'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3, 'friday': 4, 'saturday': 5, 'sunday': 6,
+}
+WEEK_INDEXES = {'first': 0, 'second': 1, 'third': 2, 'fourth': 3, 'last': -1}
+PATTERN_TYPES = ('daily', 'weekly', 'absoluteMonthly', 'relativeMonthly', 'absoluteYearly', 'relativeYearly')
+# patterns which only match on their `daysOfWeek`
+DAYS_PATTERN_TYPES = ('weekly', 'relativeMonthly', 'relativeYearly')
+
+# cancelled occurrences are listed as 'OID.<master id>.<original start date>'
+_OCCURRENCE_DATE_RE = re.compile(r'(\d{4}-\d{2}-\d{2})$')
+_DATETIME_RE = re.compile(r'^([^.]+?)(\.\d+)?(Z|[+-]\d{2}:?\d{2})?$')
+
+
+class Occurrence(object):
+    __slots__ = ('event', 'start', 'end', 'original_start', 'type')
+
+    def __init__(self, event: dict, start: datetime.datetime, end: datetime.datetime,
+                 original_start: datetime.datetime | None, type: str):
+        # the series master for generated occurrences, the event itself otherwise
+        self.event = event
+        self.start = start
+        self.end = end
+        self.original_start = original_start
+        # 'occurrence', 'exception' or 'singleInstance'
+        self.type = type
+
+    def __lt__(self, other):
+        return self.start < other.start
+
+    def __repr__(self):
+        return '<Occurrence {} {} - {}>'.format(self.type, self.start.isoformat(), self.end.isoformat())
+
+
+def parse_datetime(value: str, tz: datetime.tzinfo = UTC) -> datetime.datetime:
+    """Aware datetime of a Graph dateTime string, in `tz` when it has no offset."""
+    # Graph returns 7 fractional digits, more than fromisoformat accepts before python 3.11
+    match = _DATETIME_RE.match(value)
+    if match is None:
+        raise ValueError('Invalid date time {!r}'.format(value))
+    parsed = datetime.datetime.fromisoformat(match.group(1) + (match.group(2) or '')[:7] + (match.group(3) or ''))
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=tz)
+
+
+def _date_time(value: dict) -> datetime.datetime:
+    return parse_datetime(value['dateTime'], resolve_timezone(value.get('timeZone') or 'UTC'))
+
+
+def _aware(value: datetime.datetime) -> datetime.datetime:
+    return value.replace(tzinfo=UTC) if value.tzinfo is None else value
+
+
+def _year_month(index: int) -> tuple:
+    return index // 12, index % 12 + 1
+
+
+def _nth_weekday(year, month, days, index) -> datetime.date:
+    """The `index`-th day of the month falling on one of `days`, the last one for -1."""
+    weeks = calendar.Calendar().itermonthdates(year, month)
+    candidates = [d for d in weeks if d.month == month and d.weekday() in days]
+    return candidates[index] if index < len(candidates) else candidates[-1]
+
+
+def _day_of_month(year, month, day) -> datetime.date:
+    # a day 31 recurrence happens on the last day of shorter months
+    return datetime.date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+
+def pattern_dates(pattern: dict, start_date: datetime.date, from_date: datetime.date | None = None
+                  ) -> Iterator[datetime.date]:
+    """
+    Dates matching a recurrence pattern from `start_date` on, endlessly.
+    `from_date` skips the periods entirely before it, the first dates
+    yielded may still be before it. Raises ValueError for a pattern which
+    can't match any date.
+    """
+    kind = pattern.get('type')
+    if kind not in PATTERN_TYPES:
+        raise ValueError('Unknown recurrence pattern {!r}'.format(kind))
+    try:
+        days = {DAYS_OF_WEEK[d.lower()] for d in pattern.get('daysOfWeek') or ()}
+    except KeyError as e:
+        raise ValueError('Unknown day of week {} in recurrence pattern {!r}'.format(e, kind)) from None
+    if kind in DAYS_PATTERN_TYPES and not days:
+        raise ValueError('Recurrence pattern {!r} without daysOfWeek'.format(kind))
+    return _pattern_dates(kind, pattern, days, start_date, from_date)
+
+
+def _pattern_dates(kind, pattern, days, start_date, from_date) -> Iterator[datetime.date]:
+    interval = max(1, pattern.get('interval') or 1)
+    skip = from_date if from_date is not None and from_date > start_date else start_date
+
+    if kind == 'daily':
+        date = start_date + datetime.timedelta(days=(skip - start_date).days // interval * interval)
+        step = datetime.timedelta(days=interval)
+        while True:
+            yield date
+            date += step
+
+    elif kind == 'weekly':
+        first_day = DAYS_OF_WEEK[(pattern.get('firstDayOfWeek') or 'sunday').lower()]
+        offsets = sorted((d - first_day) % 7 for d in days)
+        week = start_date - datetime.timedelta(days=(start_date.weekday() - first_day) % 7)
+        week += datetime.timedelta(weeks=(skip - week).days // 7 // interval * interval)
+        step = datetime.timedelta(weeks=interval)
+        while True:
+            for offset in offsets:
+                date = week + datetime.timedelta(days=offset)
+                if date >= start_date:
+                    yield date
+            week += step
+
+    else:
+        if kind.endswith('Yearly'):
+            interval *= 12
+            first = start_date.year * 12 + (pattern.get('month') or start_date.month) - 1
+        else:
+            first = start_date.year * 12 + start_date.month - 1
+        month = first
+        if skip > start_date:
+            month += max(0, skip.year * 12 + skip.month - 1 - first) // interval * interval
+        while True:
+            year, number = _year_month(month)
+            if kind.startswith('absolute'):
+                date = _day_of_month(year, number, pattern.get('dayOfMonth') or start_date.day)
+            else:
+                index = WEEK_INDEXES[(pattern.get('index') or 'first').lower()]
+                date = _nth_weekday(year, number, days, index)
+            if date >= start_date:
+                yield date
+            month += interval
+
+
+def _recurrence_timezone(master: dict) -> datetime.tzinfo:
+    names = (master['recurrence']['range'].get('recurrenceTimeZone'), master.get('originalStartTimeZone'),
+             master['start'].get('timeZone'))
+    for name in names:
+        if name:
+            try:
+                return resolve_timezone(name)
+            except ValueError:
+                continue
+    return UTC
+
+
+def _original_date(value, tz) -> datetime.date:
+    if isinstance(value, datetime.datetime):
+        return _aware(value).astimezone(tz).date()
+    if isinstance(value, datetime.date):
+        return value
+    if value[:4].isdigit() and len(value) > 10:
+        return parse_datetime(value).astimezone(tz).date()
+    match = _OCCURRENCE_DATE_RE.search(value)
+    if match is None:
+        raise ValueError('No occurrence date in {!r}'.format(value))
+    return datetime.date.fromisoformat(match.group(1))
+
+
+def expand(master: dict, window_start: datetime.datetime, window_end: datetime.datetime,
+           exceptions: Iterable[dict] = (), cancelled: Iterable = ()) -> Iterator[Occurrence]:
+    """
+    Occurrences of a series master overlapping [window_start, window_end),
+    ordered by start. `exceptions` are the modified occurrences of the
+    series, with their `originalStart`; `cancelled` the original start (or
+    'OID.<id>.<date>' strings) of deleted occurrences.
+    """
+    window_start, window_end = _aware(window_start), _aware(window_end)
+    recurrence = master['recurrence']
+    pattern, recurrence_range = recurrence['pattern'], recurrence['range']
+    tz = _recurrence_timezone(master)
+    start = _date_time(master['start'])
+    duration = _date_time(master['end']) - start
+    wall_time = start.astimezone(tz).time()
+
+    replaced = {_original_date(d, tz) for d in cancelled}
+    moved = []
+    for exception in exceptions:
+        replaced.add(_original_date(exception['originalStart'], tz))
+        exception_start, exception_end = _date_time(exception['start']), _date_time(exception['end'])
+        if exception_start < window_end and exception_end > window_start:
+            moved.append(Occurrence(exception, exception_start.astimezone(UTC), exception_end.astimezone(UTC),
+                                    parse_datetime(exception['originalStart']).astimezone(UTC), 'exception'))
+    moved.sort()
+
+    start_date = datetime.date.fromisoformat(recurrence_range['startDate'])
+    range_type = recurrence_range.get('type') or 'noEnd'
+    end_date = datetime.date.fromisoformat(recurrence_range['endDate']) if range_type == 'endDate' else None
+    count = recurrence_range.get('numberOfOccurrences') if range_type == 'numbered' else None
+    # numbered series have to be counted from their first occurrence
+    from_date = None if count else (window_start - duration).astimezone(tz).date() - datetime.timedelta(days=1)
+
+    # invalid patterns raise here rather than when the occurrences are iterated
+    dates = pattern_dates(pattern, start_date, from_date)
+
+    def generated():
+        for number, date in enumerate(dates):
+            if (end_date is not None and date > end_date) or (count is not None and number >= count):
+                return
+            local_start = datetime.datetime.combine(date, wall_time, tzinfo=tz)
+            occurrence_start = local_start.astimezone(UTC)
+            if occurrence_start >= window_end:
+                return
+            occurrence_end = occurrence_start + duration
+            if occurrence_end > window_start and date not in replaced:
+                yield Occurrence(master, occurrence_start, occurrence_end, occurrence_start, 'occurrence')
+
+    return heapq.merge(generated(), moved)
+
+
+def expand_events(events: Iterable[dict], window_start: datetime.datetime, window_end: datetime.datetime
+                  ) -> Iterator[Occurrence]:
+    """
+    Occurrences of a page of events listed with their exceptions, see
+    `EventServiceBeta.list_with_exceptions`: single instances overlapping the window
+    and the expanded series masters, event by event.
+    """
+    window_start, window_end = _aware(window_start), _aware(window_end)
+    for event in events:
+        if '@removed' in event:
+            continue
+        if event.get('type') == 'seriesMaster' and event.get('recurrence'):
+            try:
+                occurrences = expand(event, window_start, window_end, event.get('exceptionOccurrences') or (),
+                                     event.get('cancelledOccurrences') or ())
+            except ValueError as e:
+                logger.warning('Skipping series %s: %s', event.get('id'), e)
+                continue
+            yield from occurrences
+        elif event.get('type', 'singleInstance') == 'singleInstance':
+            start, end = _date_time(event['start']), _date_time(event['end'])
+            if start < window_end and end > window_start:
+                yield Occurrence(event, start.astimezone(UTC), end.astimezone(UTC), None, 'singleInstance')
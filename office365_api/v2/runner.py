@@ -0,0 +1,321 @@
+"""
+Multi-process sharded sync runner.
+
+Mailboxes are spread over worker processes with consistent hashing. Each
+worker calls a user supplied `sync(mailbox, context)` function; the context
+gives access to a per-mailbox checkpoint and to throttling state shared by
+all workers through a local SQLite store. When a worker dies, the mailboxes
+it had not finished are rebalanced over the surviving workers, except the
+mailbox it was syncing once that one has killed `max_worker_deaths` workers.
+
+    office365-sync-runner mypackage.sync:sync_mailbox --mailboxes mailboxes.txt --workers 8
+"""
+import argparse
+import bisect
+import hashlib
+import importlib
+import json
+import logging
+import multiprocessing
+import multiprocessing.connection
+import os
+import sqlite3
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, List, Set
+
+from .exceptions import Office365QuotaExceededError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_PATH = 'office365-sync-state.sqlite3'
+
+
+class HashRing(object):
+    """Consistent hash ring, removing a node only moves the keys it owned."""
+    def __init__(self, nodes: Iterable[Any] = (), replicas: int = 64):
+        self.replicas = replicas
+        self._hashes: List[int] = []
+        self._nodes: Dict[int, Any] = {}
+        for node in nodes:
+            self.add(node)
+
+    @staticmethod
+    def _hash(value) -> int:
+        return int.from_bytes(hashlib.md5(str(value).encode('utf-8')).digest()[:8], 'big')
+
+    def add(self, node):
+        for replica in range(self.replicas):
+            h = self._hash('{}#{}'.format(node, replica))
+            self._nodes[h] = node
+            bisect.insort(self._hashes, h)
+
+    def remove(self, node):
+        for replica in range(self.replicas):
+            h = self._hash('{}#{}'.format(node, replica))
+            if self._nodes.pop(h, None) is not None:
+                self._hashes.remove(h)
+
+    def node_for(self, key):
+        if not self._hashes:
+            raise LookupError('The hash ring is empty')
+        index = bisect.bisect(self._hashes, self._hash(key)) % len(self._hashes)
+        return self._nodes[self._hashes[index]]
+
+
+class LocalStateStore(object):
+    """Throttling state and mailbox checkpoints shared by processes of one host."""
+    def __init__(self, path: str = DEFAULT_STATE_PATH):
+        self.path = path
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS throttle (key TEXT PRIMARY KEY, until REAL NOT NULL)')
+        self._db.execute('CREATE TABLE IF NOT EXISTS checkpoints (mailbox TEXT PRIMARY KEY, state TEXT, '
+                         'done INTEGER NOT NULL DEFAULT 0, updated REAL NOT NULL)')
+
+    def throttle(self, key: str, seconds: float):
+        until = time.time() + seconds
+        self._db.execute('INSERT INTO throttle (key, until) VALUES (?, ?) '
+                         'ON CONFLICT(key) DO UPDATE SET until = MAX(until, excluded.until)', (key, until))
+
+    def throttled_for(self, key: str) -> float:
+        row = self._db.execute('SELECT until FROM throttle WHERE key = ?', (key,)).fetchone()
+        return max(0.0, row[0] - time.time()) if row else 0.0
+
+    def load_checkpoint(self, mailbox: str):
+        row = self._db.execute('SELECT state FROM checkpoints WHERE mailbox = ?', (mailbox,)).fetchone()
+        return json.loads(row[0]) if row and row[0] is not None else None
+
+    def save_checkpoint(self, mailbox: str, state, done: bool = False):
+        self._db.execute('INSERT OR REPLACE INTO checkpoints (mailbox, state, done, updated) VALUES (?, ?, ?, ?)',
+                         (mailbox, json.dumps(state), int(done), time.time()))
+
+    def is_done(self, mailbox: str) -> bool:
+        row = self._db.execute('SELECT done FROM checkpoints WHERE mailbox = ?', (mailbox,)).fetchone()
+        return bool(row and row[0])
+
+    def reset(self, mailboxes: Iterable[str]):
+        self._db.executemany('DELETE FROM checkpoints WHERE mailbox = ?', [(m,) for m in mailboxes])
+
+    def close(self):
+        self._db.close()
+
+
+class SyncContext(object):
+    """Passed to the sync function of a mailbox."""
+    def __init__(self, mailbox: str, store: LocalStateStore, worker_id: int, throttle_key: str = 'global'):
+        self.mailbox = mailbox
+        self.store = store
+        self.worker_id = worker_id
+        self.throttle_key = throttle_key
+        self.checkpoint = store.load_checkpoint(mailbox)
+
+    def save(self, state):
+        """Persist progress, a restarted sync of the mailbox gets it back as `checkpoint`."""
+        self.checkpoint = state
+        self.store.save_checkpoint(self.mailbox, state)
+
+    def wait_for_throttle(self):
+        delay = self.store.throttled_for(self.throttle_key)
+        if delay:
+            time.sleep(delay)
+
+    def call(self, fn: Callable[[], Any], max_attempts: int = 5, default_backoff: float = 30.0):
+        """
+        Call `fn` honouring throttling reported by any worker. A 429 response
+        throttles every worker sharing the key for its Retry-After period.
+        """
+        for attempt in range(max_attempts):
+            self.wait_for_throttle()
+            try:
+                return fn()
+            except Office365QuotaExceededError as e:
+                if attempt == max_attempts - 1:
+                    raise
+                seconds = e.retry_after or default_backoff * (2 ** attempt)
+                logger.warning('Throttled while syncing %s, backing off %ss', self.mailbox, seconds)
+                self.store.throttle(self.throttle_key, seconds)
+
+
+def load_target(target):
+    if callable(target):
+        return target
+    module_name, _, attribute = target.partition(':')
+    if not attribute:
+        raise ValueError('Sync target must look like "package.module:function", got {!r}'.format(target))
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def _worker_main(worker_id, target, state_path, inbox, results):
+    sync = load_target(target)
+    store = LocalStateStore(state_path)
+    while True:
+        mailbox = inbox.get()
+        if mailbox is None:
+            break
+        if store.is_done(mailbox):
+            results.send(('finished', mailbox, None))
+            continue
+        # tells the runner which mailbox to blame if the process dies
+        results.send(('started', mailbox, None))
+        context = SyncContext(mailbox, store, worker_id)
+        try:
+            sync(mailbox, context)
+            store.save_checkpoint(mailbox, context.checkpoint, done=True)
+            results.send(('finished', mailbox, None))
+        except Exception as e:
+            logger.exception('Sync of %s failed', mailbox)
+            results.send(('finished', mailbox, repr(e)))
+    store.close()
+    results.close()
+
+
+class ShardedSyncRunner(object):
+    """
+    Run `target(mailbox, context)` for every mailbox on `workers` processes.
+
+    `target` is a picklable function or a "package.module:function" string.
+    Mailboxes already marked done in the state store are skipped, pass
+    `restart=True` to `run` to sync them again. A mailbox whose sync killed
+    `max_worker_deaths` worker processes is reported as failed instead of
+    being handed to another worker.
+    """
+    def __init__(self, target, workers: int | None = None, state_path: str = DEFAULT_STATE_PATH,
+                 poll_interval: float = 1.0, max_worker_deaths: int = 2):
+        self.target = target
+        self.workers = workers or os.cpu_count() or 1
+        self.state_path = state_path
+        self.poll_interval = poll_interval
+        self.max_worker_deaths = max_worker_deaths
+
+    def run(self, mailboxes: Iterable[str], restart: bool = False) -> Dict[str, str]:
+        """Returns the error of every mailbox that failed to sync."""
+        mailboxes = list(dict.fromkeys(mailboxes))
+        store = LocalStateStore(self.state_path)
+        if restart:
+            store.reset(mailboxes)
+        store.close()
+
+        ctx = multiprocessing.get_context()
+        # one result pipe per worker: a worker dying in the middle of a write can't block the others
+        processes, inboxes, results = {}, {}, {}
+        for worker_id in range(min(self.workers, len(mailboxes)) or 1):
+            inboxes[worker_id] = ctx.Queue()
+            results[worker_id], writer = ctx.Pipe(duplex=False)
+            processes[worker_id] = ctx.Process(
+                target=_worker_main, args=(worker_id, self.target, self.state_path, inboxes[worker_id], writer),
+                name='office365-sync-{}'.format(worker_id))
+            processes[worker_id].start()
+            writer.close()
+        ring = HashRing(processes)
+        assigned: Dict[int, Set[str]] = {worker_id: set() for worker_id in processes}
+        for mailbox in mailboxes:
+            worker_id = ring.node_for(mailbox)
+            assigned[worker_id].add(mailbox)
+            inboxes[worker_id].put(mailbox)
+
+        errors: Dict[str, str] = {}
+        # mailbox each worker is syncing, and the number of workers that died syncing a mailbox
+        running: Dict[int, str] = {}
+        deaths: Dict[str, int] = {}
+        remaining = len(mailboxes)
+        try:
+            while remaining:
+                workers = {conn: worker_id for worker_id, conn in results.items() if worker_id in processes}
+                for conn in multiprocessing.connection.wait(list(workers), timeout=self.poll_interval):
+                    worker_id = workers[conn]
+                    finished = self._receive(worker_id, conn, assigned, running, errors)
+                    if finished is None:
+                        processes[worker_id].join()
+                    else:
+                        remaining -= finished
+                for worker_id, process in list(processes.items()):
+                    if process.is_alive():
+                        continue
+                    # what the worker sent before exiting is still in its pipe
+                    while results[worker_id].poll():
+                        finished = self._receive(worker_id, results[worker_id], assigned, running, errors)
+                        if finished is None:
+                            break
+                        remaining -= finished
+                    remaining -= self._rebalance(worker_id, processes, inboxes, assigned, running, deaths, errors,
+                                                 ring)
+        finally:
+            for worker_id, process in processes.items():
+                if process.is_alive():
+                    inboxes[worker_id].put(None)
+            for process in processes.values():
+                process.join()
+        return errors
+
+    @staticmethod
+    def _receive(worker_id, conn, assigned, running, errors) -> int | None:
+        """Handle a message of a worker; the number of mailboxes it finished, None once its pipe is closed."""
+        try:
+            event, mailbox, error = conn.recv()
+        except EOFError:
+            return None
+        if event == 'started':
+            running[worker_id] = mailbox
+            return 0
+        running.pop(worker_id, None)
+        if mailbox not in assigned.get(worker_id, ()):
+            return 0
+        assigned[worker_id].discard(mailbox)
+        if error is not None:
+            errors[mailbox] = error
+        return 1
+
+    def _rebalance(self, worker_id, processes, inboxes, assigned, running, deaths, errors, ring) -> int:
+        """Hand the mailboxes of a dead worker to the others; returns the number given up on."""
+        process = processes.pop(worker_id)
+        orphans = assigned.pop(worker_id)
+        ring.remove(worker_id)
+        given_up = 0
+        mailbox = running.pop(worker_id, None)
+        if mailbox in orphans:
+            deaths[mailbox] = deaths.get(mailbox, 0) + 1
+            if deaths[mailbox] >= self.max_worker_deaths or not processes:
+                logger.error('Giving up on %s, %s workers died syncing it', mailbox, deaths[mailbox])
+                orphans.discard(mailbox)
+                errors[mailbox] = 'worker died (exit code {})'.format(process.exitcode)
+                given_up += 1
+        logger.error('Worker %s exited with code %s, rebalancing %s mailboxes',
+                     worker_id, process.exitcode, len(orphans))
+        if not processes:
+            # the results of the other mailboxes are kept
+            logger.error('All sync workers died, %s mailboxes were not synced', len(orphans))
+            for mailbox in orphans:
+                errors[mailbox] = 'all sync workers died'
+            return given_up + len(orphans)
+        for mailbox in orphans:
+            new_worker_id = ring.node_for(mailbox)
+            assigned[new_worker_id].add(mailbox)
+            inboxes[new_worker_id].put(mailbox)
+        return given_up
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sync mailboxes on several processes.')
+    parser.add_argument('target', help='sync function, as "package.module:function"')
+    parser.add_argument('--mailboxes', default='-', help='file with one mailbox per line, "-" for stdin')
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes (default: CPU count)')
+    parser.add_argument('--state', default=DEFAULT_STATE_PATH, help='path of the shared state database')
+    parser.add_argument('--restart', action='store_true', help='sync mailboxes already marked as done again')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(processName)s %(levelname)s %(message)s')
+
+    if args.mailboxes == '-':
+        mailboxes = [line.strip() for line in sys.stdin if line.strip()]
+    else:
+        with open(args.mailboxes) as f:
+            mailboxes = [line.strip() for line in f if line.strip()]
+    runner = ShardedSyncRunner(args.target, workers=args.workers, state_path=args.state)
+    errors = runner.run(mailboxes, restart=args.restart)
+    for mailbox, error in errors.items():
+        logger.error('%s: %s', mailbox, error)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+Priority-aware scheduling of the requests sent by a client.
+
+    scheduler = RequestScheduler(max_concurrency=16, reserved={INTERACTIVE: 4})
+    client = MicrosoftGraphClient(session, scheduler=scheduler)
+
+    with request_priority(INTERACTIVE):
+        client.users(user_id).event.get(event_id)
+
+At most `max_concurrency` requests are in flight, streamed downloads
+counting until their response is closed. Free slots go to the most
+important class first, some slots are only usable by higher classes, and
+inside a class slots are shared between flows (by default a tenant and a
+mailbox) with weighted fair queuing, so one backfill can't starve the
+other mailboxes. The priority is held in a context variable; threads
+started by the caller don't inherit it unless run in a copied context.
+"""
+import contextlib
+import contextvars
+import heapq
+import itertools
+import threading
+from typing import Dict, Hashable, Iterator
+
+INTERACTIVE = 0
+NEAR_REAL_TIME = 1
+BULK = 2
+PRIORITIES = (INTERACTIVE, NEAR_REAL_TIME, BULK)
+
+_current_priority: contextvars.ContextVar = contextvars.ContextVar('office365_request_priority', default=None)
+
+
+@contextlib.contextmanager
+def request_priority(priority: int, flow: Hashable | None = None):
+    """Send the requests of the block with `priority`, and as part of `flow` when given."""
+    if priority not in PRIORITIES:
+        raise ValueError('Unknown request priority {!r}'.format(priority))
+    token = _current_priority.set((priority, flow))
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority():
+    """The (priority, flow) set by `request_priority`, or None."""
+    return _current_priority.get()
+
+
+class _Waiter(object):
+    __slots__ = ('event', 'cancelled')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.cancelled = False
+
+
+class _Class(object):
+    """Waiters of a priority class, ordered by weighted fair queuing tags."""
+    def __init__(self):
+        self.waiters: list = []
+        self.virtual_time = 0.0
+        self.finish: Dict[Hashable, float] = {}
+        self.in_use = 0
+
+
+class RequestScheduler(object):
+    def __init__(self, max_concurrency: int = 16, reserved: Dict[int, int] | None = None,
+                 weights: Dict[Hashable, float] | None = None, default_priority: int = NEAR_REAL_TIME):
+        self.max_concurrency = max_concurrency
+        # slots kept free for a class and the classes above it
+        self.reserved = dict(reserved if reserved is not None else {INTERACTIVE: max(1, max_concurrency // 4)})
+        if sum(self.reserved.values()) >= max_concurrency:
+            raise ValueError('Reserved capacity must leave room for the lowest priority class')
+        self.weights = dict(weights or {})
+        self.default_priority = default_priority
+        self._lock = threading.Lock()
+        self._classes = {priority: _Class() for priority in PRIORITIES}
+        self._in_flight = 0
+        self._sequence = itertools.count()
+
+    def _held_back(self, priority) -> int:
+        """Free slots the class has to leave to the classes above it."""
+        return sum(max(0, self.reserved.get(p, 0) - self._classes[p].in_use) for p in PRIORITIES if p < priority)
+
+    def _can_run(self, priority) -> bool:
+        return self.max_concurrency - self._in_flight > self._held_back(priority)
+
+    def _grant(self, priority):
+        self._in_flight += 1
+        self._classes[priority].in_use += 1
+
+    def _dispatch(self):
+        for priority in PRIORITIES:
+            cls = self._classes[priority]
+            while cls.waiters and self._can_run(priority):
+                tag, _, waiter = heapq.heappop(cls.waiters)
+                if waiter.cancelled:
+                    continue
+                cls.virtual_time = tag
+                self._grant(priority)
+                waiter.event.set()
+
+    @contextlib.contextmanager
+    def slot(self, priority: int | None = None, flow: Hashable = None, cost: float = 1.0) -> Iterator[None]:
+        """Hold one of the request slots for the duration of the block."""
+        if priority is None:
+            priority = self.default_priority
+        cls = self._classes[priority]
+        with self._lock:
+            if not any(self._classes[p].waiters for p in PRIORITIES if p <= priority) and self._can_run(priority):
+                self._grant(priority)
+                waiter = None
+            else:
+                start = max(cls.virtual_time, cls.finish.get(flow, 0.0))
+                tag = start + cost / self.weights.get(flow, 1.0)
+                cls.finish[flow] = tag
+                if len(cls.finish) > 1024:
+                    # flows without backlog start again from the virtual time anyway
+                    cls.finish = {f: t for f, t in cls.finish.items() if t > cls.virtual_time}
+                waiter = _Waiter()
+                heapq.heappush(cls.waiters, (tag, next(self._sequence), waiter))
+        if waiter is not None:
+            try:
+                waiter.event.wait()
+            except BaseException:
+                with self._lock:
+                    if not waiter.event.is_set():
+                        waiter.cancelled = True
+                        raise
+                self._release(cls)
+                raise
+        try:
+            yield
+        finally:
+            self._release(cls)
+
+    def _release(self, cls):
+        with self._lock:
+            self._in_flight -= 1
+            cls.in_use -= 1
+            self._dispatch()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'in_flight': self._in_flight,
+                'in_use': {p: c.in_use for p, c in self._classes.items()},
+                'waiting': {p: len(c.waiters) for p, c in self._classes.items()},
+            }
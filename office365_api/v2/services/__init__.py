@@ -1,41 +1,63 @@
-from .attachment import AttachmentService
-from .base import BaseService
-from .base_beta import BaseBetaService
-from .batch import BatchService
-from .calendar import CalendarService
-from .calendar_view import CalendarViewService
-from .contact import ContactService
-from .contact_folder import ContactFolderService
-from .event import EventService
-from .event_service_beta import EventServiceBeta
-from .mail_folder import MailFolderService
-from .mailbox_settings import MailboxSettingsService
-from .master_categories import MasterCategoriesService
-from .message import MessageService
-from .online_meeting import OnlineMeetingService
-from .online_meeting_recordings import OnlineMeetingRecordingsService
-from .online_meeting_transcripts import OnlineMeetingTranscriptsService
-from .subscription import SubscriptionService
-from .user import UserService
-
-__all__ = [
-    "AttachmentService",
-    "BaseService",
-    "BaseBetaService",
-    "BatchService",
-    "CalendarService",
-    "CalendarViewService",
-    "ContactService",
-    "ContactFolderService",
-    "EventService",
-    "EventServiceBeta",
-    "MailFolderService",
-    "MailboxSettingsService",
-    "MasterCategoriesService",
-    "MessageService",
-    "OnlineMeetingService",
-    "OnlineMeetingRecordingsService",
-    "OnlineMeetingTranscriptsService",
-    "SubscriptionService",
-    "UserService",
-]
+import importlib
+from typing import TYPE_CHECKING
+
+# services are imported on first access, e.g. `from office365_api.v2.services import MessageService`
+_SERVICES = {
+    "AttachmentService": ".attachment",
+    "BaseService": ".base",
+    "BaseBetaService": ".base_beta",
+    "BatchService": ".batch",
+    "CalendarService": ".calendar",
+    "CalendarViewService": ".calendar_view",
+    "ContactService": ".contact",
+    "ContactFolderService": ".contact_folder",
+    "EventService": ".event",
+    "EventServiceBeta": ".event_service_beta",
+    "MailFolderService": ".mail_folder",
+    "MailboxSettingsService": ".mailbox_settings",
+    "MasterCategoriesService": ".master_categories",
+    "MessageService": ".message",
+    "OnlineMeetingService": ".online_meeting",
+    "OnlineMeetingRecordingsService": ".online_meeting_recordings",
+    "OnlineMeetingTranscriptsService": ".online_meeting_transcripts",
+    "ScheduleService": ".schedule",
+    "SubscriptionService": ".subscription",
+    "UserService": ".user",
+}
+
+__all__ = list(_SERVICES)
+
+
+def __getattr__(name):
+    if name not in _SERVICES:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    value = getattr(importlib.import_module(_SERVICES[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from .attachment import AttachmentService
+    from .base import BaseService
+    from .base_beta import BaseBetaService
+    from .batch import BatchService
+    from .calendar import CalendarService
+    from .calendar_view import CalendarViewService
+    from .contact import ContactService
+    from .contact_folder import ContactFolderService
+    from .event import EventService
+    from .event_service_beta import EventServiceBeta
+    from .mail_folder import MailFolderService
+    from .mailbox_settings import MailboxSettingsService
+    from .master_categories import MasterCategoriesService
+    from .message import MessageService
+    from .online_meeting import OnlineMeetingService
+    from .online_meeting_recordings import OnlineMeetingRecordingsService
+    from .online_meeting_transcripts import OnlineMeetingTranscriptsService
+    from .schedule import ScheduleService
+    from .subscription import SubscriptionService
+    from .user import UserService
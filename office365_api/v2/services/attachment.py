@@ -1,13 +1,24 @@
 import json
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, List
 
+from ..consts import STREAM_CHUNK_SIZE
+from ..endpoints import ENDPOINTS
+from ..query import apply_query
 from .base import BaseService
 
+ATTACHMENT_METADATA_FIELDS = ['id', 'name', 'size', 'contentType', 'isInline']
+
+
+def attachments_expand(fields=None):
+    """`$expand` value reading attachment metadata along with messages, e.g. `MessageService.list(expand=...)`."""
+    return 'attachments($select={})'.format(','.join(fields or ATTACHMENT_METADATA_FIELDS))
+
 
 class AttachmentService(BaseService):
-    def list(self, message_id, _filter=None, fields=[], max_entries=50):
-        path = '/messages/{}/attachments'.format(message_id)
-        method = 'get'
+    def list(self, message_id, _filter=None, fields=[], max_entries=50, query=None):
+        endpoint = ENDPOINTS['attachments.list']
+        path = endpoint.path(message_id=message_id)
+        method = endpoint.method
         query_params: Dict[str, Any] = {
             "$top": max_entries
         }
@@ -15,7 +26,8 @@ class AttachmentService(BaseService):
             query_params['$filter'] = _filter
         if fields:
             query_params['$select'] = ','.join(fields)
-        resp = self.execute_request(method, path, query_params=query_params)
+        query_params = apply_query(query_params, query)
+        resp = self.execute_request(method, path, query_params=query_params, endpoint=endpoint)
         next_link = resp.get('@odata.nextLink')
         return resp, next_link
 
@@ -24,17 +36,43 @@ class AttachmentService(BaseService):
         return resp
 
     def get(self, message_id, attachment_id):
-        path = '/messages/{}/attachments/{}'.format(message_id, attachment_id)
-        method = 'get'
-        return self.execute_request(method, path)
+        endpoint = ENDPOINTS['attachments.get']
+        path = endpoint.path(message_id=message_id, attachment_id=attachment_id)
+        method = endpoint.method
+        return self.execute_request(method, path, endpoint=endpoint)
 
     def get_content(self, message_id, attachment_id):
-        path = '/messages/{}/attachments/{}/$value'.format(message_id, attachment_id)
-        method = 'get'
-        return self.execute_request(method, path, parse_json_result=False)
+        endpoint = ENDPOINTS['attachments.content']
+        path = endpoint.path(message_id=message_id, attachment_id=attachment_id)
+        return self.fetch_content(path, endpoint=endpoint)
+
+    def iter_content(self, message_id, attachment_id, chunk_size=STREAM_CHUNK_SIZE):
+        endpoint = ENDPOINTS['attachments.content']
+        path = endpoint.path(message_id=message_id, attachment_id=attachment_id)
+        return self.stream_content(path, chunk_size=chunk_size, endpoint=endpoint)
+
+    def list_metadata(self, message_ids: Iterable[str], fields=None, **options) -> Dict[str, List[dict]]:
+        """
+        Read the attachment metadata of many messages without content bytes.
+
+        Messages are read through $batch with `$expand=attachments($select=...)`.
+        Returns attachments by message id; messages that could not be read are
+        missing from the result.
+        """
+        message_ids = list(message_ids)
+        query_params = {'$select': 'id', '$expand': attachments_expand(fields)}
+        endpoint = ENDPOINTS['messages.get']
+
+        def build(service, message_id):
+            return service.execute_request(endpoint.method, endpoint.path(message_id=message_id),
+                                           query_params=query_params, endpoint=endpoint)
+        results = self.execute_bulk(build, message_ids, **options)
+        return {message_id: result.body.get('attachments', [])
+                for message_id, result in zip(message_ids, results) if result.ok}
 
     def create(self, message_id, **kwargs):
-        path = '/messages/{}/attachments'.format(message_id)
-        method = 'post'
+        endpoint = ENDPOINTS['attachments.create']
+        path = endpoint.path(message_id=message_id)
+        method = endpoint.method
         body = json.dumps(kwargs)
-        return self.execute_request(method, path, body=body)
+        return self.execute_request(method, path, body=body, endpoint=endpoint)
@@ -1,18 +1,68 @@
+import contextlib
 import logging
 import urllib.parse
 
-from requests import HTTPError
-from requests.exceptions import ChunkedEncodingError
-from requests.exceptions import ConnectionError as RequestsConnectionError
-from requests.exceptions import JSONDecodeError as RequestsJSONDecodeError
-
-from ..consts import (DEFAULT_MAX_ENTRIES, RESPONSE_FORMAT_ODATA,
-                      RESPONSE_FORMAT_RAW, RETRIES_COUNT)
+from ..coalescing import coalescing_key
+from ..consts import (DEFAULT_MAX_ENTRIES, IMMUTABLE_ID_PREFERENCE,
+                      RESPONSE_FORMAT_ODATA, RESPONSE_FORMAT_RAW,
+                      RETRIES_COUNT, STREAM_CHUNK_SIZE)
 from ..exceptions import (Office365ClientError, Office365QuotaExceededError,
                           Office365ServerError)
+from ..patches import as_batch_request
+from ..scheduler import current_priority
 
 logger = logging.getLogger(__name__)
 
+_requests_exceptions_module = None
+
+
+def _requests_exceptions():
+    """`requests.exceptions`, imported by the first call only instead of on every request."""
+    global _requests_exceptions_module
+    if _requests_exceptions_module is None:
+        # requests is only imported once a request is sent, it dominates the package import time
+        import requests.exceptions
+        _requests_exceptions_module = requests.exceptions
+    return _requests_exceptions_module
+
+
+def add_preference(headers, preference):
+    """Add `preference` to the comma separated Prefer header of `headers`."""
+    current = headers.get('Prefer')
+    if not current:
+        headers['Prefer'] = preference
+    elif preference not in current:
+        headers['Prefer'] = current + ', ' + preference
+
+
+class ScheduledStream(object):
+    """
+    A response opened by `open_stream` holding a slot of the client request
+    scheduler until it is closed.
+    """
+    def __init__(self, response, slot: contextlib.ExitStack):
+        self.response = response
+        self._slot = slot
+
+    def __getattr__(self, name):
+        return getattr(self.response, name)
+
+    def close(self):
+        try:
+            self.response.close()
+        finally:
+            self._slot.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        # a stream dropped without being closed must not keep its slot forever
+        self._slot.close()
+
 
 class BaseService(object):
     base_url = 'https://graph.microsoft.com'
@@ -39,7 +89,42 @@ class BaseService(object):
         next_link = resp.get('@odata.nextLink')
         return resp, next_link
 
-    def execute_request(self, method, path, query_params=None, headers=None, body=None, parse_json_result=True, set_content_type=True):
+    def iter_pages(self, resp, next_link, max_entries=DEFAULT_MAX_ENTRIES, fields=None, index=None):
+        """
+        Yield `resp` and every following page, e.g. `iter_pages(*service.list())`.
+        Pages are ingested by the `IdIndex` passed as `index` before being yielded.
+        With a client `page_sizer`, following pages are sized by it instead of `max_entries`.
+        """
+        page_sizer = getattr(self.client, 'page_sizer', None)
+        if page_sizer is not None:
+            pages = page_sizer.iter_pages(self, (resp, next_link), fields=fields)
+        else:
+            pages = self._follow_pages(resp, next_link, max_entries, fields)
+        for page in pages:
+            if index is not None:
+                index.ingest(page)
+            yield page
+
+    def _follow_pages(self, resp, next_link, max_entries, fields):
+        while True:
+            yield resp
+            if not next_link:
+                break
+            resp, next_link = self.follow_next_link(next_link, max_entries=max_entries, fields=fields)
+
+    def execute_bulk(self, build, items, **options):
+        """
+        Run `build(batch_service, item)` for every item and send the resulting
+        requests through `execute_bulk`. Returns one `BulkResult` per item.
+        """
+        from ..bulk import execute_bulk
+        batch_service = as_batch_request(self)
+        options.setdefault('beta', self.graph_api_version == 'beta')
+        return execute_bulk(self.client, [build(batch_service, item) for item in items], **options)
+
+    def execute_request(self, method, path, query_params=None, headers=None, body=None, parse_json_result=True, set_content_type=True,
+                        endpoint=None):
+        """`endpoint` is the registry entry the path was built from, see `office365_api.v2.endpoints`."""
         full_url = self.build_url(path)
         if query_params:
             querystring = urllib.parse.urlencode(query_params)
@@ -50,38 +135,161 @@ class BaseService(object):
             default_headers = {}
         if headers:
             default_headers.update(headers)
-        logger.info('{}: {}'.format(method.upper(), full_url))
+        self._add_client_preferences(default_headers)
+
+        def send():
+            return self._scheduled_send(method, full_url, default_headers, body, parse_json_result, endpoint)
+        hedging = getattr(self.client, 'hedging', None)
+        if hedging is not None and hedging.applies(endpoint):
+            unhedged = send
+
+            def send():
+                return hedging.run(endpoint.name, unhedged)
+        single_flight = getattr(self.client, 'single_flight', None)
+        if single_flight is not None and method.lower() == 'get' and (endpoint is None or endpoint.idempotent):
+            key = coalescing_key(method, full_url, default_headers) + (parse_json_result,)
+            return single_flight.do(key, send)
+        return send()
+
+    def _add_client_preferences(self, headers):
+        if getattr(self.client, 'immutable_ids', False):
+            add_preference(headers, IMMUTABLE_ID_PREFERENCE)
+
+    def _schedule(self, cost=1.0):
+        """Slot of the client request scheduler, a no-op without one."""
+        scheduler = getattr(self.client, 'scheduler', None)
+        if scheduler is None:
+            return contextlib.nullcontext()
+        priority, flow = current_priority() or (None, None)
+        if flow is None:
+            flow = (getattr(self.client, 'tenant_id', None), self.prefix)
+        return scheduler.slot(priority, flow, cost=cost)
+
+    def _scheduled_send(self, method, full_url, headers, body, parse_json_result, endpoint=None):
+        with self._schedule():
+            return self._send(method, full_url, headers, body, parse_json_result, endpoint)
+
+    def _authorize(self, headers):
+        """Add the client access token to the headers, returns the token used or None."""
+        if getattr(self.client, 'token_cache', None) is None:
+            return None
+        access_token = self.client.get_access_token()
+        headers['Authorization'] = 'Bearer ' + access_token
+        return access_token
+
+    def _send(self, method, full_url, headers, body, parse_json_result, endpoint=None):
+        errors = _requests_exceptions()
+        logger.info('{}: {}'.format(method.upper(), full_url), extra={'endpoint': endpoint.name if endpoint else None})
         retries = RETRIES_COUNT
+        headers = dict(headers)
+        auth_retried = False
         while True:
+            access_token = self._authorize(headers)
             try:
-                resp = self.client.session.request(url=full_url, method=method.upper(), data=body, headers=default_headers)
+                resp = self.client.session.request(url=full_url, method=method.upper(), data=body, headers=headers)
                 if parse_json_result:
                     try:
                         return resp.json()
-                    except RequestsJSONDecodeError:
+                    except errors.JSONDecodeError:
                         return resp.content
                 else:
                     return resp.content
-            except HTTPError as e:
-                if e.response.status_code < 500:
-                    try:
-                        error_data = e.response.json()
-                    except (ValueError, RequestsJSONDecodeError):
-                        error_data = {'error': {'message': e.response.content, 'code': 'unknown'}}
-                    if e.response.status_code == 429:
-                        retry_after = None
-                        try:
-                            retry_after = int(
-                                e.response.headers.get('Retry-After'))
-                        except Exception as ex:
-                            logger.error(
-                                'Error parsing Retry-After header: %s', ex)
-                        raise Office365QuotaExceededError(
-                            data=error_data, retry_after=retry_after) from e
-                    raise Office365ClientError(e.response.status_code, error_data) from e
-                else:
-                    raise Office365ServerError(e.response.status_code, e.response.content) from e
-            except (ConnectionResetError, RequestsConnectionError, ChunkedEncodingError, ):
+            except errors.HTTPError as e:
+                if e.response.status_code == 401 and access_token and not auth_retried:
+                    # the token was revoked or expired early, retry once with a new one
+                    auth_retried = True
+                    self.client.invalidate_access_token(access_token)
+                    continue
+                raise map_http_error(e) from e
+            except (ConnectionResetError, errors.ConnectionError, errors.ChunkedEncodingError, ):
+                retries -= 1
+                if retries == 0:
+                    raise
+
+    def fetch_content(self, path, query_params=None, endpoint=None):
+        """GET raw content, served from the client blob cache when one is configured."""
+        def fetch():
+            return self.execute_request('get', path, query_params=query_params, parse_json_result=False,
+                                        endpoint=endpoint)
+        blob_cache = getattr(self.client, 'blob_cache', None)
+        if blob_cache is None:
+            return fetch()
+        key = self.build_url(path)
+        if query_params:
+            key += '?' + urllib.parse.urlencode(query_params)
+        return blob_cache.get_or_fetch(key, fetch)
+
+    def open_stream(self, method, path, query_params=None, headers=None, endpoint=None):
+        """
+        Send a request without reading the body.
+
+        Returns the http response, the caller has to consume it
+        (e.g. with `iter_content`) and close it. With a client scheduler, the
+        response holds a request slot until it is closed.
+        """
+        if getattr(self.client, 'scheduler', None) is None:
+            return self._open_stream(method, path, query_params, headers, endpoint)
+        slot = contextlib.ExitStack()
+        slot.enter_context(self._schedule())
+        try:
+            resp = self._open_stream(method, path, query_params, headers, endpoint)
+        except BaseException:
+            slot.close()
+            raise
+        return ScheduledStream(resp, slot)
+
+    def _open_stream(self, method, path, query_params, headers, endpoint):
+        errors = _requests_exceptions()
+        full_url = self.build_url(path)
+        if query_params:
+            full_url += '?' + urllib.parse.urlencode(query_params)
+        logger.info('{}: {} (stream)'.format(method.upper(), full_url),
+                    extra={'endpoint': endpoint.name if endpoint else None})
+        retries = RETRIES_COUNT
+        headers = dict(headers or {})
+        self._add_client_preferences(headers)
+        auth_retried = False
+        while True:
+            access_token = self._authorize(headers)
+            try:
+                return self.client.session.request(url=full_url, method=method.upper(), headers=headers, stream=True)
+            except errors.HTTPError as e:
+                if e.response.status_code == 401 and access_token and not auth_retried:
+                    auth_retried = True
+                    self.client.invalidate_access_token(access_token)
+                    continue
+                raise map_http_error(e) from e
+            except (ConnectionResetError, errors.ConnectionError, ):
                 retries -= 1
                 if retries == 0:
                     raise
+
+    def stream_content(self, path, query_params=None, headers=None, chunk_size=STREAM_CHUNK_SIZE, endpoint=None):
+        """Download the body of a GET request chunk by chunk."""
+        resp = self.open_stream('get', path, query_params=query_params, headers=headers, endpoint=endpoint)
+        try:
+            yield from resp.iter_content(chunk_size=chunk_size)
+        finally:
+            resp.close()
+
+
+def map_http_error(e):
+    """Translate an HTTPError raised by the session into the client exceptions."""
+    if e.response.status_code < 500:
+        try:
+            error_data = e.response.json()
+        except (ValueError, _requests_exceptions().JSONDecodeError):
+            error_data = {'error': {'message': e.response.content, 'code': 'unknown'}}
+        if e.response.status_code == 429:
+            retry_after = None
+            try:
+                retry_after = int(
+                    e.response.headers.get('Retry-After'))
+            except Exception as ex:
+                logger.error(
+                    'Error parsing Retry-After header: %s', ex)
+            return Office365QuotaExceededError(
+                data=error_data, retry_after=retry_after)
+        return Office365ClientError(e.response.status_code, error_data)
+    else:
+        return Office365ServerError(e.response.status_code, e.response.content)
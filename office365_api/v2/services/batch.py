@@ -1,20 +1,19 @@
 import logging
 
-from requests import HTTPError
-from requests.exceptions import JSONDecodeError as RequestsJSONDecodeError
-
 from office365_api.v2.exceptions import (Office365ClientError,
                                          Office365QuotaExceededError,
                                          Office365ServerError)
 
-from .base import BaseService
+from ..coalescing import coalescing_key
+from .base import BaseService, _requests_exceptions
 
 logger = logging.getLogger(__name__)
 
 
 class BatchService(BaseService):
-    def __init__(self, client, beta=True):
+    def __init__(self, client, beta=True, coalesce=False):
         self.client = client
+        self.coalesce = coalesce
         channel = 'beta' if beta else 'v1.0'
         self.batch_uri = f'https://graph.microsoft.com/{channel}/$batch'
         self._callbacks = {}
@@ -22,6 +21,8 @@ class BatchService(BaseService):
         self._order = []
         self._last_auto_id = 0
         self._responses = {}
+        self._access_token = None
+        self.prefix = ''
 
     def _new_id(self):
         self._last_auto_id += 1
@@ -30,12 +31,18 @@ class BatchService(BaseService):
         return str(self._last_auto_id)
 
     def add(self, request, callback=None):
+        if getattr(self.client, 'immutable_ids', False):
+            # requests built by hand, not through as_batch_request, need the client preferences too
+            request = dict(request, headers=dict(request.get('headers') or {}))
+            self._add_client_preferences(request['headers'])
         request_id = self._new_id()
         self._requests[request_id] = request
         self._callbacks[request_id] = callback
         self._order.append(request_id)
+        return request_id
 
     def _execute(self, requests):
+        errors = _requests_exceptions()
         if self.is_empty:
             raise Office365ClientError(
                 error_message='No requests to execute in a batch')
@@ -43,18 +50,32 @@ class BatchService(BaseService):
         default_headers = {'Content-Type': 'application/json'}
         logger.info('{}: {} with {}x requests'.format(
             method, self.batch_uri, len(requests)))
+        self._access_token = self._authorize(default_headers)
         try:
-            resp = self.client.session.request(
-                url=self.batch_uri,
-                method=method,
-                json={'requests': requests},
-                headers=default_headers)
+            # a batch weighs as much as its sub-requests in the fair queue
+            with self._schedule(cost=len(requests)):
+                resp = self.client.session.request(
+                    url=self.batch_uri,
+                    method=method,
+                    json={'requests': requests},
+                    headers=default_headers)
             return resp.json()
-        except HTTPError as e:
+        except errors.HTTPError as e:
+            if e.response.status_code == 401 and self._access_token:
+                # retry once with a new token
+                self.client.invalidate_access_token(self._access_token)
+                self._authorize(default_headers)
+                try:
+                    with self._schedule(cost=len(requests)):
+                        resp = self.client.session.request(
+                            url=self.batch_uri, method=method, json={'requests': requests}, headers=default_headers)
+                    return resp.json()
+                except errors.HTTPError as retry_error:
+                    e = retry_error
             if e.response.status_code < 500:
                 try:
                     error_data = e.response.json()
-                except (ValueError, RequestsJSONDecodeError):
+                except (ValueError, errors.JSONDecodeError):
                     error_data = {
                         'error': {'message': e.response.content, 'code': 'unknown'}}
                 if e.response.status_code == 429:
@@ -74,15 +95,40 @@ class BatchService(BaseService):
 
     def execute(self):
         requests = []
+        # identical GET requests are sent once, duplicates reuse the response of the first one
+        duplicates = {}
+        seen = {}
+        depended_on = {d for r in self._requests.values() for d in r.get('dependsOn', [])}
         for request_id in self._order:
             request = self._requests[request_id]
+            if self.coalesce and request.get('method', '').upper() == 'GET' and \
+                    'dependsOn' not in request and request_id not in depended_on:
+                key = coalescing_key(request['method'], request['url'], request.get('headers'))
+                if key in seen:
+                    duplicates[request_id] = seen[key]
+                    continue
+                seen[key] = request_id
             request['id'] = request_id
             requests.append(request)
         responses = self._execute(requests)
         for resp in responses['responses']:
             self._responses[resp['id']] = resp
+        unauthorized = {resp['id'] for resp in responses['responses'] if resp['status'] == 401}
+        if unauthorized and self._access_token:
+            # sub-requests rejected with an expired token are sent once more with a new one
+            self.client.invalidate_access_token(self._access_token)
+            retried = []
+            for request in requests:
+                if request['id'] in unauthorized:
+                    request = dict(request)
+                    depends_on = [d for d in request.pop('dependsOn', []) if d in unauthorized]
+                    if depends_on:
+                        request['dependsOn'] = depends_on
+                    retried.append(request)
+            for resp in self._execute(retried)['responses']:
+                self._responses[resp['id']] = resp
         for request_id in self._order:
-            response = self._responses[request_id]
+            response = self._responses[duplicates.get(request_id, request_id)]
             request = self._requests[request_id]
             callback = self._callbacks[request_id]
             exception = None
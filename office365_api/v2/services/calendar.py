@@ -1,43 +1,53 @@
 import json
 from typing import Any, Dict
 
+from ..diff import MinimalPatchMixin
+from ..endpoints import ENDPOINTS
+from ..query import apply_query
 from .base import BaseService
 
 
-class CalendarService(BaseService):
-    def list(self, _filter='', max_entries=50):
-        path = '/calendars'
-        method = 'get'
+class CalendarService(MinimalPatchMixin, BaseService):
+    def list(self, _filter='', max_entries=50, query=None):
+        endpoint = ENDPOINTS['calendars.list']
+        path = endpoint.path()
+        method = endpoint.method
         query_params: Dict[str, Any] = {
             "$top": max_entries
         }
         if _filter:
             query_params['$filter'] = _filter
-        resp = self.execute_request(method, path, query_params=query_params)
+        query_params = apply_query(query_params, query)
+        resp = self.execute_request(method, path, query_params=query_params, endpoint=endpoint)
         next_link = resp.get('@odata.nextLink')
         return resp, next_link
 
     def get(self, calendar_id=None):
         if calendar_id:
-            path = '/calendars/' + calendar_id
+            endpoint = ENDPOINTS['calendars.get']
+            path = endpoint.path(calendar_id=calendar_id)
         else:
-            path = '/calendar'
-        method = 'get'
-        return self.execute_request(method, path)
+            endpoint = ENDPOINTS['calendar.get']
+            path = endpoint.path()
+        method = endpoint.method
+        return self.execute_request(method, path, endpoint=endpoint)
 
     def create(self, **kwargs):
-        path = '/calendars'
-        method = 'post'
+        endpoint = ENDPOINTS['calendars.create']
+        path = endpoint.path()
+        method = endpoint.method
         body = json.dumps(kwargs)
-        return self.execute_request(method, path, body=body)
+        return self.execute_request(method, path, body=body, endpoint=endpoint)
 
     def delete(self, calendar_id):
-        path = '/calendars/' + calendar_id
-        method = 'delete'
-        return self.execute_request(method, path)
+        endpoint = ENDPOINTS['calendars.delete']
+        path = endpoint.path(calendar_id=calendar_id)
+        method = endpoint.method
+        return self.execute_request(method, path, endpoint=endpoint)
 
     def update(self, calendar_id, **kwargs):
-        path = '/calendars/' + calendar_id
-        method = 'patch'
+        endpoint = ENDPOINTS['calendars.update']
+        path = endpoint.path(calendar_id=calendar_id)
+        method = endpoint.method
         body = json.dumps(kwargs)
-        return self.execute_request(method, path, body=body)
+        return self.execute_request(method, path, body=body, endpoint=endpoint)
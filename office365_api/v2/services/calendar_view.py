@@ -1,12 +1,16 @@
+from ..endpoints import ENDPOINTS
+from ..query import apply_query
 from .base import BaseService
 
 class CalendarViewService(BaseService):
-    def list(self, start_datetime, end_datetime, max_entries=50, _filter='', calendar_id=None):
-        path = ''
+    def list(self, start_datetime, end_datetime, max_entries=50, _filter='', calendar_id=None, query=None):
         if calendar_id:
-            path = '/calendars/%s' % calendar_id
-        path += '/calendarView'
-        method = 'get'
+            endpoint = ENDPOINTS['calendar_view.calendar_list']
+            path = endpoint.path(calendar_id=calendar_id)
+        else:
+            endpoint = ENDPOINTS['calendar_view.list']
+            path = endpoint.path()
+        method = endpoint.method
         query_params = {
             'startDateTime': start_datetime,
             'endDateTime': end_datetime,
@@ -14,16 +18,20 @@ class CalendarViewService(BaseService):
         }
         if _filter:
             query_params['$filter'] = _filter
-        resp = self.execute_request(method, path, query_params=query_params)
+        query_params = apply_query(query_params, query)
+        resp = self.execute_request(method, path, query_params=query_params, endpoint=endpoint)
         next_link = resp.get('@odata.nextLink')
         return resp, next_link
 
-    def delta_list(self, start_datetime=None, end_datetime=None, delta_token=None, calendar_id=None, max_entries=50):
-        path = ''
+    def delta_list(self, start_datetime=None, end_datetime=None, delta_token=None, calendar_id=None, max_entries=50,
+                   query=None):
         if calendar_id:
-            path = '/calendars/%s' % calendar_id
-        path += '/calendarView/delta'
-        method = 'get'
+            endpoint = ENDPOINTS['calendar_view.calendar_delta']
+            path = endpoint.path(calendar_id=calendar_id)
+        else:
+            endpoint = ENDPOINTS['calendar_view.delta']
+            path = endpoint.path()
+        method = endpoint.method
         headers = {
             'Prefer': 'odata.maxpagesize=%d' % max_entries
         }
@@ -33,11 +41,13 @@ class CalendarViewService(BaseService):
                 'startDateTime': start_datetime,
                 'endDateTime': end_datetime,
             })
+            # the options of the initial request are part of the delta token
+            query_params = apply_query(query_params, query)
         else:
             query_params.update({
                 '$deltaToken': delta_token,
             })
         resp = self.execute_request(
-            method, path, query_params=query_params, headers=headers)
+            method, path, query_params=query_params, headers=headers, endpoint=endpoint)
         next_link = resp.get('@odata.nextLink')
         return resp, next_link
@@ -1,46 +1,67 @@
 import json
 from typing import Any, Dict
 
+from ..diff import MinimalPatchMixin
+from ..endpoints import ENDPOINTS
+from ..query import apply_query
 from .base import BaseService
 
 
-class ContactService(BaseService):
+class ContactService(MinimalPatchMixin, BaseService):
     def create(self, contact_folder_id=None, **kwargs):
         if contact_folder_id:
-            path = '/contactFolders/' + contact_folder_id + '/contacts'
+            endpoint = ENDPOINTS['contacts.folder_create']
+            path = endpoint.path(contact_folder_id=contact_folder_id)
         else:
-            path = '/contacts'
-        method = 'post'
+            endpoint = ENDPOINTS['contacts.create']
+            path = endpoint.path()
+        method = endpoint.method
         body = json.dumps(kwargs)
-        return self.execute_request(method, path, body=body)
+        return self.execute_request(method, path, body=body, endpoint=endpoint)
 
-    def list(self, contact_folder_id=None, _filter='', max_entries=50):
+    def list(self, contact_folder_id=None, _filter='', max_entries=50, query=None):
         if contact_folder_id:
-            path = '/contactFolders/' + contact_folder_id + '/contacts'
+            endpoint = ENDPOINTS['contacts.folder_list']
+            path = endpoint.path(contact_folder_id=contact_folder_id)
         else:
-            path = '/contacts'
-        method = 'get'
+            endpoint = ENDPOINTS['contacts.list']
+            path = endpoint.path()
+        method = endpoint.method
         query_params: Dict[str, Any] = {
             "$top": max_entries
         }
         if _filter:
             query_params['$filter'] = _filter
-        resp = self.execute_request(method, path, query_params=query_params)
+        query_params = apply_query(query_params, query)
+        resp = self.execute_request(method, path, query_params=query_params, endpoint=endpoint)
         next_link = resp.get('@odata.nextLink')
         return resp, next_link
 
     def get(self, contact_id):
-        path = '/contacts/' + contact_id
-        method = 'get'
-        return self.execute_request(method, path)
+        endpoint = ENDPOINTS['contacts.get']
+        path = endpoint.path(contact_id=contact_id)
+        method = endpoint.method
+        return self.execute_request(method, path, endpoint=endpoint)
 
     def delete(self, contact_id):
-        path = '/contacts/' + contact_id
-        method = 'delete'
-        return self.execute_request(method, path)
+        endpoint = ENDPOINTS['contacts.delete']
+        path = endpoint.path(contact_id=contact_id)
+        method = endpoint.method
+        return self.execute_request(method, path, endpoint=endpoint)
 
     def update(self, contact_id, **kwargs):
-        path = '/contacts/' + contact_id
-        method = 'patch'
+        endpoint = ENDPOINTS['contacts.update']
+        path = endpoint.path(contact_id=contact_id)
+        method = endpoint.method
         body = json.dumps(kwargs)
-        return self.execute_request(method, path, body=body)
+        return self.execute_request(method, path, body=body, endpoint=endpoint)
+
+    def bulk_create(self, payloads, contact_folder_id=None, **options):
+        return self.execute_bulk(lambda service, payload: service.create(contact_folder_id, **payload), payloads, **options)
+
+    def bulk_update(self, updates, **options):
+        """`updates` is an iterable of (contact_id, payload) pairs."""
+        return self.execute_bulk(lambda service, update: service.update(update[0], **update[1]), updates, **options)
+
+    def bulk_delete(self, contact_ids, **options):
+        return self.execute_bulk(lambda service, contact_id: service.delete(contact_id), contact_ids, **options)
@@ -1,34 +1,42 @@
 import json
 from typing import Any, Dict, List, Tuple
 
+from ..endpoints import ENDPOINTS
+from ..query import apply_query
 from .base import BaseService
 
 
 class ContactFolderService(BaseService):
-    def list(self, max_entries=50):
-        path = '/contactFolders'
-        method = 'get'
+    def list(self, max_entries=50, query=None):
+        endpoint = ENDPOINTS['contact_folders.list']
+        path = endpoint.path()
+        method = endpoint.method
         query_params = {
             '$top': max_entries
         }
-        resp = self.execute_request(method, path, query_params=query_params)
+        query_params = apply_query(query_params, query)
+        resp = self.execute_request(method, path, query_params=query_params, endpoint=endpoint)
         next_link = resp.get('@odata.nextLink')
         return resp, next_link
 
     def get(self, folder_id):
-        path = '/contactFolders/' + folder_id
-        method = 'get'
-        return self.execute_request(method, path)
+        endpoint = ENDPOINTS['contact_folders.get']
+        path = endpoint.path(folder_id=folder_id)
+        method = endpoint.method
+        return self.execute_request(method, path, endpoint=endpoint)
 
     def create(self, **kwargs):
-        path = '/contactFolders'
-        method = 'post'
+        endpoint = ENDPOINTS['contact_folders.create']
+        path = endpoint.path()
+        method = endpoint.method
         body = json.dumps(kwargs)
-        return self.execute_request(method, path, body=body)
+        return self.execute_request(method, path, body=body, endpoint=endpoint)
 
-    def delta_list(self, folder_id: str = 'contacts', fields: List[str] = [], delta_token: str | None = None, max_entries=50) -> Tuple[Dict[str, Any], str]:
-        path = f"/contactFolders('{folder_id}')/contacts/delta"
-        method = 'get'
+    def delta_list(self, folder_id: str = 'contacts', fields: List[str] = [], delta_token: str | None = None, max_entries=50,
+                   query=None) -> Tuple[Dict[str, Any], str]:
+        endpoint = ENDPOINTS['contact_folders.contacts_delta']
+        path = endpoint.path(folder_id=folder_id)
+        method = endpoint.method
         query_params = None
         if delta_token:
             query_params = {
@@ -38,9 +46,11 @@ class ContactFolderService(BaseService):
             query_params = {
                 '$select': ','.join(fields)
             }
+        if not delta_token:
+            query_params = apply_query(query_params, query)
         headers = {
             'Prefer': 'odata.maxpagesize=%d' % max_entries
         }
-        resp = self.execute_request(method, path, query_params=query_params, headers=headers)
+        resp = self.execute_request(method, path, query_params=query_params, headers=headers, endpoint=endpoint)
         next_link = resp.get('@odata.nextLink')
         return resp, next_link
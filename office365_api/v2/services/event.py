@@ -1,52 +1,67 @@
 import json
 from typing import Any, Dict
 
+from ..diff import MinimalPatchMixin
+from ..endpoints import ENDPOINTS, quote_id
+from ..query import apply_query
 from .base import BaseService
 
 
-class EventService(BaseService):
+class EventService(MinimalPatchMixin, BaseService):
     def create(self, calendar_id=None, **kwargs):
         if calendar_id:
-            path = '/calendars/' + calendar_id + '/events'
+            endpoint = ENDPOINTS['events.calendar_create']
+            path = endpoint.path(calendar_id=calendar_id)
         else:
-            path = '/calendar/events'
-        method = 'post'
+            endpoint = ENDPOINTS['events.create']
+            path = endpoint.path()
+        method = endpoint.method
         body = json.dumps(kwargs)
-        return self.execute_request(method, path, body=body)
+        return self.execute_request(method, path, body=body, endpoint=endpoint)
 
-    def list(self, calendar_id=None, _filter='', max_entries=50):
+    def list(self, calendar_id=None, _filter='', max_entries=50, query=None):
         if calendar_id:
-            path = '/calendars/' + calendar_id + '/events'
+            endpoint = ENDPOINTS['events.calendar_list']
+            path = endpoint.path(calendar_id=calendar_id)
         else:
-            path = '/calendar/events'
-        method = 'get'
+            endpoint = ENDPOINTS['events.list']
+            path = endpoint.path()
+        method = endpoint.method
         query_params: Dict[str, Any] = {
             "$top": max_entries
         }
         if _filter:
             query_params['$filter'] = _filter
-        resp = self.execute_request(method, path, query_params=query_params)
+        query_params = apply_query(query_params, query)
+        resp = self.execute_request(method, path, query_params=query_params, endpoint=endpoint)
         next_link = resp.get('@odata.nextLink')
         return resp, next_link
 
     def get(self, event_id, params=None, path=None):
-        if not path:
-            path = '/calendar/events/'
-        path += event_id
-        method = 'get'
-        return self.execute_request(method, path, query_params=params)
+        endpoint = ENDPOINTS['events.get']
+        path = path + quote_id(event_id) if path else endpoint.path(event_id=event_id)
+        method = endpoint.method
+        return self.execute_request(method, path, query_params=params, endpoint=endpoint)
 
     def update(self, event_id, path=None, **kwargs):
-        if not path:
-            path = '/calendar/events/'
-        path += event_id
-        method = 'patch'
+        endpoint = ENDPOINTS['events.update']
+        path = path + quote_id(event_id) if path else endpoint.path(event_id=event_id)
+        method = endpoint.method
         body = json.dumps(kwargs)
-        return self.execute_request(method, path, body=body)
+        return self.execute_request(method, path, body=body, endpoint=endpoint)
 
     def delete(self, event_id, path=None):
-        if not path:
-            path = '/calendar/events/'
-        path += event_id
-        method = 'delete'
-        return self.execute_request(method, path)
+        endpoint = ENDPOINTS['events.delete']
+        path = path + quote_id(event_id) if path else endpoint.path(event_id=event_id)
+        method = endpoint.method
+        return self.execute_request(method, path, endpoint=endpoint)
+
+    def bulk_create(self, payloads, calendar_id=None, **options):
+        return self.execute_bulk(lambda service, payload: service.create(calendar_id, **payload), payloads, **options)
+
+    def bulk_update(self, updates, path=None, **options):
+        """`updates` is an iterable of (event_id, payload) pairs."""
+        return self.execute_bulk(lambda service, update: service.update(update[0], path, **update[1]), updates, **options)
+
+    def bulk_delete(self, event_ids, path=None, **options):
+        return self.execute_bulk(lambda service, event_id: service.delete(event_id, path), event_ids, **options)
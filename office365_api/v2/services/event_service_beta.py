@@ -1,14 +1,41 @@
+from ..endpoints import ENDPOINTS, quote_id
+from ..query import apply_query
 from .base_beta import BaseBetaService
 
+# what office365_api.v2.recurrence needs to expand series masters locally
+SERIES_FIELDS = ('type', 'start', 'end', 'recurrence', 'originalStartTimeZone', 'cancelledOccurrences')
+
 class EventServiceBeta(BaseBetaService):
     def get(self, event_id, params=None, path=None, fields=None):
         fields = fields or []
-        if not path:
-            path = '/events/'
-        path += event_id
+        endpoint = ENDPOINTS['events_beta.get']
+        path = path + quote_id(event_id) if path else endpoint.path(event_id=event_id)
         if params is None:
             params = {}
         if fields:
             params['$select'] = ','.join(fields)
-        method = 'get'
-        return self.execute_request(method, path, query_params=params)
+        method = endpoint.method
+        return self.execute_request(method, path, query_params=params, endpoint=endpoint)
+
+    def list_with_exceptions(self, calendar_id=None, max_entries=50, fields=None, query=None):
+        """
+        Single instances and series masters, with the exceptions and cancelled
+        occurrences of the series, instead of every occurrence as in a
+        calendar view. `fields` are selected on top of `SERIES_FIELDS`.
+        """
+        if calendar_id:
+            endpoint = ENDPOINTS['events_beta.calendar_list']
+            path = endpoint.path(calendar_id=calendar_id)
+        else:
+            endpoint = ENDPOINTS['events_beta.list']
+            path = endpoint.path()
+        method = endpoint.method
+        query_params = {
+            '$top': max_entries,
+            '$select': ','.join(dict.fromkeys(SERIES_FIELDS + tuple(fields or ()))),
+            '$expand': 'exceptionOccurrences',
+        }
+        query_params = apply_query(query_params, query)
+        resp = self.execute_request(method, path, query_params=query_params, endpoint=endpoint)
+        next_link = resp.get('@odata.nextLink')
+        return resp, next_link
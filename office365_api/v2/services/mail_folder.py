@@ -1,27 +1,33 @@
 import json
 
+from ..endpoints import ENDPOINTS
+from ..query import apply_query
 from .base import BaseService
 
 
 class MailFolderService(BaseService):
     def create(self, **kwargs):
-        path = '/mailFolders'
-        method = 'post'
+        endpoint = ENDPOINTS['mail_folders.create']
+        path = endpoint.path()
+        method = endpoint.method
         body = json.dumps(kwargs)
-        return self.execute_request(method, path, body=body)
+        return self.execute_request(method, path, body=body, endpoint=endpoint)
 
-    def list(self, max_entries=50):
-        path = '/mailFolders'
-        method = 'get'
+    def list(self, max_entries=50, query=None):
+        endpoint = ENDPOINTS['mail_folders.list']
+        path = endpoint.path()
+        method = endpoint.method
         query_params = {'$top': max_entries}
-        resp = self.execute_request(method, path, query_params=query_params)
+        query_params = apply_query(query_params, query)
+        resp = self.execute_request(method, path, query_params=query_params, endpoint=endpoint)
         next_link = resp.get('@odata.nextLink')
         return resp, next_link
 
-    def delta_list(self, folder_id, delta_token=None, _filter=None, max_entries=50, fields=None):
+    def delta_list(self, folder_id, delta_token=None, _filter=None, max_entries=50, fields=None, query=None):
         fields = fields or []
-        path = '/mailFolders/{}/messages/delta'.format(folder_id)
-        method = 'get'
+        endpoint = ENDPOINTS['mail_folders.messages_delta']
+        path = endpoint.path(folder_id=folder_id)
+        method = endpoint.method
         headers = {
             'Prefer': 'odata.maxpagesize=%d' % max_entries
         }
@@ -32,25 +38,45 @@ class MailFolderService(BaseService):
             query_params.update({'$filter': _filter})
         if fields:
             query_params.update({'$select': ','.join(fields)})
-        resp = self.execute_request(method, path, query_params=query_params, headers=headers)
+        if not delta_token:
+            query_params = apply_query(query_params, query)
+        resp = self.execute_request(method, path, query_params=query_params, headers=headers, endpoint=endpoint)
+        next_link = resp.get('@odata.nextLink')
+        return resp, next_link
+
+    def delta_folders(self, delta_token=None, max_entries=50):
+        endpoint = ENDPOINTS['mail_folders.delta']
+        path = endpoint.path()
+        method = endpoint.method
+        headers = {
+            'Prefer': 'odata.maxpagesize=%d' % max_entries
+        }
+        query_params = {}
+        if delta_token:
+            query_params.update({'$deltaToken': delta_token})
+        resp = self.execute_request(method, path, query_params=query_params, headers=headers, endpoint=endpoint)
         next_link = resp.get('@odata.nextLink')
         return resp, next_link
 
     def get(self, folder_id):
-        path = '/mailFolders/' + folder_id
-        method = 'get'
-        return self.execute_request(method, path)
+        endpoint = ENDPOINTS['mail_folders.get']
+        path = endpoint.path(folder_id=folder_id)
+        method = endpoint.method
+        return self.execute_request(method, path, endpoint=endpoint)
 
-    def list_childfolders(self, folder_id, max_entries=50):
-        path = '/mailFolders/' + folder_id + '/childFolders'
-        method = 'get'
+    def list_childfolders(self, folder_id, max_entries=50, query=None):
+        endpoint = ENDPOINTS['mail_folders.child_list']
+        path = endpoint.path(folder_id=folder_id)
+        method = endpoint.method
         query_params = {'$top': max_entries}
-        resp = self.execute_request(method, path, query_params=query_params)
+        query_params = apply_query(query_params, query)
+        resp = self.execute_request(method, path, query_params=query_params, endpoint=endpoint)
         next_link = resp.get('@odata.nextLink')
         return resp, next_link
 
     def create_childfolder(self, folder_id, **kwargs):
-        path = '/mailFolders/' + folder_id + '/childFolders'
-        method = 'post'
+        endpoint = ENDPOINTS['mail_folders.child_create']
+        path = endpoint.path(folder_id=folder_id)
+        method = endpoint.method
         body = json.dumps(kwargs)
-        return self.execute_request(method, path, body=body)
+        return self.execute_request(method, path, body=body, endpoint=endpoint)
@@ -1,8 +1,10 @@
+from ..endpoints import ENDPOINTS
 from .base import BaseService
 
 class MailboxSettingsService(BaseService):
     def get(self):
-        path = '/mailboxSettings'
-        method = 'get'
-        resp = self.execute_request(method, path)
+        endpoint = ENDPOINTS['mailbox_settings.get']
+        path = endpoint.path()
+        method = endpoint.method
+        resp = self.execute_request(method, path, endpoint=endpoint)
         return resp
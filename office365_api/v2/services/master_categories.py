@@ -1,35 +1,47 @@
 import json
 
+from ..diff import MinimalPatchMixin
+from ..endpoints import ENDPOINTS
+from ..query import apply_query
 from .base import BaseService
 
 
-class MasterCategoriesService(BaseService):
-    def list(self, max_entries=50):
-        path = '/masterCategories'
-        method = 'get'
+class MasterCategoriesService(MinimalPatchMixin, BaseService):
+    def list(self, max_entries=50, query=None):
+        endpoint = ENDPOINTS['master_categories.list']
+        path = endpoint.path()
+        method = endpoint.method
         query_params = {'$top': max_entries}
-        resp = self.execute_request(method, path, query_params=query_params)
+        query_params = apply_query(query_params, query)
+        resp = self.execute_request(method, path, query_params=query_params, endpoint=endpoint)
         next_link = resp.get('@odata.nextLink')
         return resp, next_link
 
     def create(self, **kwargs):
-        path = '/masterCategories'
-        method = 'post'
+        endpoint = ENDPOINTS['master_categories.create']
+        path = endpoint.path()
+        method = endpoint.method
         body = json.dumps(kwargs)
-        return self.execute_request(method, path, body=body)
+        return self.execute_request(method, path, body=body, endpoint=endpoint)
 
     def get(self, category_id):
-        path = '/masterCategories/' + category_id
-        method = 'get'
-        return self.execute_request(method, path)
+        endpoint = ENDPOINTS['master_categories.get']
+        path = endpoint.path(category_id=category_id)
+        method = endpoint.method
+        return self.execute_request(method, path, endpoint=endpoint)
 
     def update(self, category_id, **kwargs):
-        path = '/masterCategories/' + category_id
-        method = 'patch'
+        endpoint = ENDPOINTS['master_categories.update']
+        path = endpoint.path(category_id=category_id)
+        method = endpoint.method
         body = json.dumps(kwargs)
-        return self.execute_request(method, path, body=body)
+        return self.execute_request(method, path, body=body, endpoint=endpoint)
 
     def delete(self, category_id):
-        path = '/masterCategories/' + category_id
-        method = 'delete'
-        return self.execute_request(method, path)
+        endpoint = ENDPOINTS['master_categories.delete']
+        path = endpoint.path(category_id=category_id)
+        method = endpoint.method
+        return self.execute_request(method, path, endpoint=endpoint)
+
+    def bulk_create(self, payloads, **options):
+        return self.execute_bulk(lambda service, payload: service.create(**payload), payloads, **options)
@@ -1,14 +1,20 @@
 import json
 from typing import Any, Dict
 
+from ..consts import STREAM_CHUNK_SIZE
+from ..diff import MinimalPatchMixin
+from ..endpoints import ENDPOINTS
+from ..mime import StreamingMimeMessage
+from ..query import apply_query
 from .base import BaseService
 
 
-class MessageService(BaseService):
-    def list(self, _filter=None, _search=None, max_entries=50, fields=None):
+class MessageService(MinimalPatchMixin, BaseService):
+    def list(self, _filter=None, _search=None, max_entries=50, fields=None, expand=None, query=None):
         fields = fields or []
-        path = '/messages'
-        method = 'get'
+        endpoint = ENDPOINTS['messages.list']
+        path = endpoint.path()
+        method = endpoint.method
         query_params: Dict[str, Any] = {
             "$top": max_entries
         }
@@ -18,7 +24,10 @@ class MessageService(BaseService):
             query_params['$search'] = _search
         if fields:
             query_params['$select'] = ','.join(fields)
-        resp = self.execute_request(method, path, query_params=query_params)
+        if expand:
+            query_params['$expand'] = expand
+        query_params = apply_query(query_params, query)
+        resp = self.execute_request(method, path, query_params=query_params, endpoint=endpoint)
         next_link = resp.get('@odata.nextLink')
         return resp, next_link
 
@@ -26,33 +35,54 @@ class MessageService(BaseService):
         if format not in self.supported_response_formats:
             raise ValueError(format)
         if format == 'odata':
-            path = '/messages/{}'.format(message_id)
+            endpoint = ENDPOINTS['messages.get']
         elif format == 'raw':
-            path = '/messages/{}/$value'.format(message_id)
+            endpoint = ENDPOINTS['messages.raw']
         else:
             raise NotImplementedError(format)
-        method = 'get'
-        return self.execute_request(method, path, query_params=_filter, parse_json_result=(not format == 'raw'))
+        path = endpoint.path(message_id=message_id)
+        method = endpoint.method
+        return self.execute_request(method, path, query_params=_filter, parse_json_result=(not format == 'raw'),
+                                    endpoint=endpoint)
+
+    def stream_raw(self, message_id, chunk_size=STREAM_CHUNK_SIZE) -> StreamingMimeMessage:
+        """Download the MIME content of a message, parsing it while it arrives."""
+        endpoint = ENDPOINTS['messages.raw']
+        path = endpoint.path(message_id=message_id)
+        return StreamingMimeMessage(self.stream_content(path, chunk_size=chunk_size, endpoint=endpoint),
+                                    chunk_size=chunk_size)
 
     def create(self, **kwargs):
-        path = '/messages'
-        method = 'post'
+        endpoint = ENDPOINTS['messages.create']
+        path = endpoint.path()
+        method = endpoint.method
         body = json.dumps(kwargs)
-        return self.execute_request(method, path, body=body)
+        return self.execute_request(method, path, body=body, endpoint=endpoint)
 
     def send(self, message_id, **kwargs):
-        path = '/messages/{}/send'.format(message_id)
-        method = 'post'
-        return self.execute_request(method, path, headers={'Content-Length': '0'}, set_content_type=False, parse_json_result=False)
+        endpoint = ENDPOINTS['messages.send']
+        path = endpoint.path(message_id=message_id)
+        method = endpoint.method
+        return self.execute_request(method, path, headers={'Content-Length': '0'}, set_content_type=False, parse_json_result=False,
+                                    endpoint=endpoint)
 
     def update(self, message_id, **kwargs):
-        path = '/messages/{}'.format(message_id)
-        method = 'patch'
+        endpoint = ENDPOINTS['messages.update']
+        path = endpoint.path(message_id=message_id)
+        method = endpoint.method
         body = json.dumps(kwargs)
-        return self.execute_request(method, path, body=body)
+        return self.execute_request(method, path, body=body, endpoint=endpoint)
 
     def move(self, message_id, destination_id):
-        path = '/messages/{}/move'.format(message_id)
-        method = 'post'
+        endpoint = ENDPOINTS['messages.move']
+        path = endpoint.path(message_id=message_id)
+        method = endpoint.method
         body = json.dumps({'DestinationId': destination_id})
-        return self.execute_request(method, path, body=body)
+        return self.execute_request(method, path, body=body, endpoint=endpoint)
+
+    def bulk_create(self, payloads, **options):
+        return self.execute_bulk(lambda service, payload: service.create(**payload), payloads, **options)
+
+    def bulk_update(self, updates, **options):
+        """`updates` is an iterable of (message_id, payload) pairs."""
+        return self.execute_bulk(lambda service, update: service.update(update[0], **update[1]), updates, **options)
@@ -1,42 +1,51 @@
 import json
 from typing import Any, Dict
 
+from ..diff import MinimalPatchMixin
+from ..endpoints import ENDPOINTS
+from ..query import apply_query
 from .base import BaseService
 
 
-class OnlineMeetingService(BaseService):
+class OnlineMeetingService(MinimalPatchMixin, BaseService):
     base_path = 'onlineMeetings'
 
-    def list(self, _filter: str):
-        if not _filter:
+    def list(self, _filter: str = '', query=None):
+        endpoint = ENDPOINTS['online_meetings.list']
+        path = endpoint.path()
+        method = endpoint.method
+        query_params: Dict[str, Any] = {}
+        if _filter:
+            query_params['$filter'] = _filter
+        query_params = apply_query(query_params, query)
+        if not query_params.get('$filter'):
             raise ValueError("Filter parameter is required for listing online meetings.")
-        path = self.base_path
-        method = 'get'
-        query_params: Dict[str, Any] = {
-            "$filter": _filter,
-        }
-        resp = self.execute_request(method, path, query_params=query_params)
+        resp = self.execute_request(method, path, query_params=query_params, endpoint=endpoint)
         next_link = resp.get('@odata.nextLink')
         return resp, next_link
 
     def get(self, meeting_id: str) -> Dict[str, Any]:
-        path = f'{self.base_path}/{meeting_id}'
-        method = 'get'
-        return self.execute_request(method, path)
+        endpoint = ENDPOINTS['online_meetings.get']
+        path = endpoint.path(meeting_id=meeting_id)
+        method = endpoint.method
+        return self.execute_request(method, path, endpoint=endpoint)
 
     def create(self, **kwargs) -> Dict[str, Any]:
-        path = self.base_path
-        method = 'post'
+        endpoint = ENDPOINTS['online_meetings.create']
+        path = endpoint.path()
+        method = endpoint.method
         body = json.dumps(kwargs)
-        return self.execute_request(method, path, body=body)
+        return self.execute_request(method, path, body=body, endpoint=endpoint)
 
     def update(self, meeting_id: str, **kwargs) -> Dict[str, Any]:
-        path = f'{self.base_path}/{meeting_id}'
-        method = 'patch'
+        endpoint = ENDPOINTS['online_meetings.update']
+        path = endpoint.path(meeting_id=meeting_id)
+        method = endpoint.method
         body = json.dumps(kwargs)
-        return self.execute_request(method, path, body=body)
+        return self.execute_request(method, path, body=body, endpoint=endpoint)
 
     def delete(self, meeting_id: str) -> Dict[str, Any]:
-        path = f'{self.base_path}/{meeting_id}'
-        method = 'delete'
-        return self.execute_request(method, path)
+        endpoint = ENDPOINTS['online_meetings.delete']
+        path = endpoint.path(meeting_id=meeting_id)
+        method = endpoint.method
+        return self.execute_request(method, path, endpoint=endpoint)
@@ -1,24 +1,41 @@
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Iterator, Tuple
 
+from ..consts import STREAM_CHUNK_SIZE
+from ..downloads import DEFAULT_PART_SIZE, RangedDownload
+from ..endpoints import ENDPOINTS
+from ..query import apply_query
 from .base import BaseService
 
 
 class OnlineMeetingRecordingsService(BaseService):
     base_path = 'recordings'
 
-    def list(self) -> Tuple[Dict[str, Any], str]:
-        path = self.base_path
-        method = 'get'
-        resp = self.execute_request(method, path)
+    def list(self, query=None) -> Tuple[Dict[str, Any], str]:
+        endpoint = ENDPOINTS['recordings.list']
+        path = endpoint.path()
+        method = endpoint.method
+        resp = self.execute_request(method, path, query_params=apply_query(None, query), endpoint=endpoint)
         next_link = resp.get('@odata.nextLink')
         return resp, next_link
 
     def get(self, recording_id: str) -> Dict[str, Any]:
-        path = f'{self.base_path}/{recording_id}'
-        method = 'get'
-        return self.execute_request(method, path)
+        endpoint = ENDPOINTS['recordings.get']
+        path = endpoint.path(recording_id=recording_id)
+        method = endpoint.method
+        return self.execute_request(method, path, endpoint=endpoint)
 
     def get_content(self, recording_id: str) -> bytes:
-        path = f'{self.base_path}/{recording_id}/content'
-        method = 'get'
-        return self.execute_request(method, path, parse_json_result=False)
+        endpoint = ENDPOINTS['recordings.content']
+        path = endpoint.path(recording_id=recording_id)
+        return self.fetch_content(path, endpoint=endpoint)
+
+    def iter_content(self, recording_id: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        endpoint = ENDPOINTS['recordings.content']
+        path = endpoint.path(recording_id=recording_id)
+        return self.stream_content(path, chunk_size=chunk_size, endpoint=endpoint)
+
+    def download(self, recording_id: str, destination: str, part_size: int = DEFAULT_PART_SIZE,
+                 max_workers: int = 4) -> int:
+        """Download the recording to a file over parallel range requests, resuming a previous attempt."""
+        path = ENDPOINTS['recordings.content'].path(recording_id=recording_id)
+        return RangedDownload(self, path, destination, part_size=part_size, max_workers=max_workers).run()
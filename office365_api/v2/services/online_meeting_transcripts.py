@@ -1,24 +1,37 @@
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Iterator, Tuple
 
+from ..consts import STREAM_CHUNK_SIZE
+from ..endpoints import ENDPOINTS
+from ..query import apply_query
+from ..transcripts import TranscriptCue, iter_vtt_cues
 from .base import BaseService
 
 
 class OnlineMeetingTranscriptsService(BaseService):
     base_path = 'transcripts'
 
-    def list(self) -> Tuple[Dict[str, Any], str]:
-        path = self.base_path
-        method = 'get'
-        resp = self.execute_request(method, path)
+    def list(self, query=None) -> Tuple[Dict[str, Any], str]:
+        endpoint = ENDPOINTS['transcripts.list']
+        path = endpoint.path()
+        method = endpoint.method
+        resp = self.execute_request(method, path, query_params=apply_query(None, query), endpoint=endpoint)
         next_link = resp.get('@odata.nextLink')
         return resp, next_link
 
     def get(self, transcript_id: str) -> Dict[str, Any]:
-        path = f'{self.base_path}/{transcript_id}'
-        method = 'get'
-        return self.execute_request(method, path)
+        endpoint = ENDPOINTS['transcripts.get']
+        path = endpoint.path(transcript_id=transcript_id)
+        method = endpoint.method
+        return self.execute_request(method, path, endpoint=endpoint)
 
     def get_content(self, transcript_id: str, transcript_format: str = 'text/vtt') -> bytes:
-        path = f'{self.base_path}/{transcript_id}/content'
-        method = 'get'
-        return self.execute_request(method, path, query_params={'$format': transcript_format}, parse_json_result=False)
+        endpoint = ENDPOINTS['transcripts.content']
+        path = endpoint.path(transcript_id=transcript_id)
+        return self.fetch_content(path, query_params={'$format': transcript_format}, endpoint=endpoint)
+
+    def iter_cues(self, transcript_id: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[TranscriptCue]:
+        """Parse the WebVTT transcript while it is downloaded."""
+        endpoint = ENDPOINTS['transcripts.content']
+        path = endpoint.path(transcript_id=transcript_id)
+        return iter_vtt_cues(self.stream_content(path, query_params={'$format': 'text/vtt'}, chunk_size=chunk_size,
+                                                 endpoint=endpoint))
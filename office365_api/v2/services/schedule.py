@@ -0,0 +1,135 @@
+import datetime
+import heapq
+import json
+import logging
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Tuple
+
+from ..endpoints import ENDPOINTS
+from ..exceptions import Office365ClientError
+from .base import BaseService
+
+logger = logging.getLogger(__name__)
+
+# getSchedule accepts at most 20 schedules per request
+SCHEDULE_MAX_SCHEDULES = 20
+BUSY_STATUSES = ('busy', 'oof', 'tentative', 'workingElsewhere')
+
+
+class UnreadableSchedulesError(Office365ClientError):
+    """Some schedules could not be read, `errors` holds the error of each address."""
+    def __init__(self, errors: Dict[str, dict]):
+        super(UnreadableSchedulesError, self).__init__(
+            error_message='Could not read the schedule of {}'.format(', '.join(sorted(errors))))
+        self.errors = errors
+
+
+def _utc(value: datetime.datetime) -> datetime.datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=datetime.timezone.utc)
+    return value.astimezone(datetime.timezone.utc)
+
+
+def _timestamp(date_time: dict) -> float:
+    # Graph returns 7 fractional digits, more than fromisoformat accepts before python 3.11
+    value, _, fraction = date_time['dateTime'].partition('.')
+    parsed = datetime.datetime.fromisoformat(value).replace(tzinfo=datetime.timezone.utc)
+    return parsed.timestamp() + (float('0.' + fraction) if fraction else 0.0)
+
+
+def merge_intervals(intervals: Iterable[Tuple[float, float]]) -> array:
+    """
+    Merge overlapping or touching (start, end) intervals into a flat array of
+    `[start0, end0, start1, end1, ...]` timestamps.
+    """
+    merged = array('d')
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1]:
+            merged[-1] = max(merged[-1], end)
+        else:
+            merged.extend((start, end))
+    return merged
+
+
+def free_slots(busy: Iterable[array], start: datetime.datetime, end: datetime.datetime,
+               duration: datetime.timedelta) -> List[Tuple[datetime.datetime, datetime.datetime]]:
+    """Gaps of at least `duration` between `start` and `end` where nobody in `busy` is busy."""
+    pairs = heapq.merge(*[zip(b[0::2], b[1::2]) for b in busy])
+    cursor = _utc(start).timestamp()
+    stop = _utc(end).timestamp()
+    minimum = duration.total_seconds()
+    slots = []
+    for busy_start, busy_end in pairs:
+        if busy_start >= stop:
+            break
+        if busy_start - cursor >= minimum:
+            slots.append((cursor, busy_start))
+        cursor = max(cursor, busy_end)
+    if stop - cursor >= minimum:
+        slots.append((cursor, stop))
+    to_datetime = datetime.datetime.fromtimestamp
+    return [(to_datetime(s, datetime.timezone.utc), to_datetime(e, datetime.timezone.utc)) for s, e in slots]
+
+
+class ScheduleService(BaseService):
+    """Free/busy information of many users and rooms through `getSchedule`."""
+    def get_schedule(self, schedules: List[str], start: datetime.datetime, end: datetime.datetime,
+                     interval: int = 30):
+        endpoint = ENDPOINTS['schedule.get']
+        path = endpoint.path()
+        method = endpoint.method
+        body = json.dumps({
+            'schedules': list(schedules),
+            'startTime': {'dateTime': _utc(start).replace(tzinfo=None).isoformat(), 'timeZone': 'UTC'},
+            'endTime': {'dateTime': _utc(end).replace(tzinfo=None).isoformat(), 'timeZone': 'UTC'},
+            'availabilityViewInterval': interval,
+        })
+        headers = {'Prefer': 'outlook.timezone="UTC"'}
+        return self.execute_request(method, path, body=body, headers=headers, endpoint=endpoint)
+
+    def busy_intervals(self, schedules: Iterable[str], start: datetime.datetime, end: datetime.datetime,
+                       busy_statuses=BUSY_STATUSES, chunk_size: int = SCHEDULE_MAX_SCHEDULES,
+                       max_workers: int = 4, unreadable: Dict[str, dict] | None = None) -> Dict[str, array]:
+        """
+        Merged busy intervals by schedule address, as flat arrays of UTC
+        timestamps (see `merge_intervals`). Schedules are requested in chunks
+        of `chunk_size`, concurrently. Schedules Graph could not read raise
+        `UnreadableSchedulesError`, or are left out and added to the
+        `unreadable` dict with their error when one is given.
+        """
+        schedules = list(dict.fromkeys(schedules))
+        chunks = [schedules[i:i + chunk_size] for i in range(0, len(schedules), chunk_size)]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            responses = list(executor.map(lambda chunk: self.get_schedule(chunk, start, end), chunks))
+        busy = {}
+        errors = {}
+        for resp in responses:
+            for schedule in resp.get('value', []):
+                if 'error' in schedule:
+                    errors[schedule.get('scheduleId')] = schedule['error']
+                    continue
+                busy[schedule['scheduleId']] = merge_intervals(
+                    (_timestamp(item['start']), _timestamp(item['end']))
+                    for item in schedule.get('scheduleItems', []) if item.get('status') in busy_statuses)
+        # Graph may change the case of the addresses
+        answered = {address.lower() for address in list(busy) + list(errors) if address}
+        for address in schedules:
+            if address.lower() not in answered:
+                errors[address] = {'message': 'Missing from the getSchedule response'}
+        if errors:
+            if unreadable is None:
+                raise UnreadableSchedulesError(errors)
+            logger.warning('No schedule for %s', ', '.join(sorted(errors)))
+            unreadable.update(errors)
+        return busy
+
+    def find_free_slots(self, schedules: Iterable[str], start: datetime.datetime, end: datetime.datetime,
+                        duration: datetime.timedelta, **options) -> List[Tuple[datetime.datetime, datetime.datetime]]:
+        """
+        Time ranges of at least `duration` where every schedule is free.
+        Raises `UnreadableSchedulesError` rather than take unreadable
+        schedules for free ones.
+        """
+        busy = self.busy_intervals(schedules, start, end, **options)
+        return free_slots(busy.values(), start, end, duration)
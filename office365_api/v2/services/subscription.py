@@ -3,6 +3,7 @@ import json
 from datetime import datetime
 from typing import List
 
+from ..endpoints import ENDPOINTS
 from .base import BaseService
 
 
@@ -14,8 +15,9 @@ class SubscriptionService(BaseService):
     def create(self, resource: str, change_type: List[str], notification_url: str, expiration_datetime: datetime,
                client_state: str | None = None, include_resource_data: bool = False, encryption_certificate: bytes | None = None,
                 encryption_certificate_id: str | None = None, lifecycle_notification_url: str | None = None, **kwargs)->dict:
-        path = 'subscriptions'
-        method = 'post'
+        endpoint = ENDPOINTS['subscriptions.create']
+        path = endpoint.path()
+        method = endpoint.method
         body: dict = {
             "changeType": ','.join(change_type),
             "notificationUrl": notification_url,
@@ -35,17 +37,19 @@ class SubscriptionService(BaseService):
         if lifecycle_notification_url:
             body["lifecycleNotificationUrl"] = lifecycle_notification_url
         body.update(kwargs)
-        return self.execute_request(method, path, body=json.dumps(body))
+        return self.execute_request(method, path, body=json.dumps(body), endpoint=endpoint)
 
     def renew(self, subscription_id: str, expiration_datetime: datetime):
-        path = f'subscriptions/{subscription_id}'
-        method = 'patch'
+        endpoint = ENDPOINTS['subscriptions.renew']
+        path = endpoint.path(subscription_id=subscription_id)
+        method = endpoint.method
         body = {
             "expirationDateTime": expiration_datetime.isoformat()
         }
-        return self.execute_request(method, path, body=json.dumps(body))
+        return self.execute_request(method, path, body=json.dumps(body), endpoint=endpoint)
 
     def delete(self, subscription_id: str):
-        path = f'subscriptions/{subscription_id}'
-        method = 'delete'
-        return self.execute_request(method, path)
+        endpoint = ENDPOINTS['subscriptions.delete']
+        path = endpoint.path(subscription_id=subscription_id)
+        method = endpoint.method
+        return self.execute_request(method, path, endpoint=endpoint)
@@ -1,8 +1,49 @@
+import json
+from typing import Iterable, Iterator, List, Tuple
+
+from ..consts import TRANSLATE_IDS_MAX
+from ..endpoints import ENDPOINTS
 from .base import BaseService
 
 class UserService(BaseService):
     def get(self):
-        path = ''
-        method = 'get'
-        resp = self.execute_request(method, path)
+        endpoint = ENDPOINTS['user.get']
+        path = endpoint.path()
+        method = endpoint.method
+        resp = self.execute_request(method, path, endpoint=endpoint)
+        return resp
+
+    def translate_exchange_id_chunk(self, ids: List[str], target_id_type='restImmutableEntryId',
+                                    source_id_type='restId'):
+        endpoint = ENDPOINTS['user.translate_exchange_ids']
+        path = endpoint.path()
+        method = endpoint.method
+        body = json.dumps({
+            'inputIds': list(ids),
+            'targetIdType': target_id_type,
+            'sourceIdType': source_id_type,
+        })
+        resp = self.execute_request(method, path, body=body, endpoint=endpoint)
         return resp
+
+    def translate_exchange_ids(self, ids: Iterable[str], target_id_type='restImmutableEntryId',
+                               source_id_type='restId', chunk_size=TRANSLATE_IDS_MAX) -> Iterator[Tuple[str, str]]:
+        """
+        Yield (source id, target id) for stored ids, e.g. to migrate them to
+        immutable ids, requesting `chunk_size` ids at a time. The target id is
+        None for ids Graph could not translate, e.g. deleted items.
+        """
+        chunk = []
+        for item_id in ids:
+            chunk.append(item_id)
+            if len(chunk) == chunk_size:
+                yield from self._translated(chunk, target_id_type, source_id_type)
+                chunk = []
+        if chunk:
+            yield from self._translated(chunk, target_id_type, source_id_type)
+
+    def _translated(self, chunk, target_id_type, source_id_type):
+        resp = self.translate_exchange_id_chunk(chunk, target_id_type, source_id_type)
+        translated = {item['sourceId']: item.get('targetId') for item in resp.get('value', []) if 'sourceId' in item}
+        for item_id in chunk:
+            yield item_id, translated.get(item_id)
@@ -0,0 +1,161 @@
+"""
+Streaming WebVTT parsing and bulk export of online meeting transcripts.
+
+    exporter = TranscriptExporter(client.users(organizer_id).onlineMeetings, sink=writer.write)
+    exporter.export(meeting_ids)
+"""
+import codecs
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, Tuple
+
+from .exceptions import Office365ClientError, Office365ServerError
+
+logger = logging.getLogger(__name__)
+
+_TIMING_RE = re.compile(r'^\s*(\S+)\s+-->\s+(\S+)')
+_VOICE_RE = re.compile(r'<v(?:\.[^\s>]*)?\s+([^>]*)>')
+_TAG_RE = re.compile(r'</?[^>]*>')
+
+
+def parse_timestamp(value: str) -> float:
+    """Seconds of a WebVTT timestamp, `hh:mm:ss.ttt` or `mm:ss.ttt`."""
+    seconds = 0.0
+    for part in value.split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+class TranscriptCue(object):
+    __slots__ = ('identifier', 'start', 'end', 'speaker', 'text')
+
+    def __init__(self, identifier, start, end, speaker, text):
+        self.identifier = identifier
+        self.start = start
+        self.end = end
+        self.speaker = speaker
+        self.text = text
+
+    def as_dict(self) -> dict:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def __repr__(self):
+        return '<TranscriptCue {:.3f}-{:.3f} {}: {}>'.format(self.start, self.end, self.speaker, self.text)
+
+
+def _iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    rest = ''
+    for chunk in chunks:
+        rest += decoder.decode(chunk)
+        lines = rest.splitlines(keepends=True)
+        # a trailing \r may be the first half of a \r\n split over two chunks
+        rest = lines.pop() if lines and not lines[-1].endswith('\n') else ''
+        for line in lines:
+            yield line.rstrip('\r\n')
+    rest += decoder.decode(b'', final=True)
+    for line in rest.splitlines():
+        yield line
+
+
+def _make_cue(block):
+    identifier = None
+    if '-->' not in block[0]:
+        identifier = block.pop(0)
+        if not block:
+            return None
+    timing = _TIMING_RE.match(block[0])
+    if timing is None:
+        return None
+    text = '\n'.join(block[1:])
+    voice = _VOICE_RE.search(text)
+    speaker = voice.group(1).strip() if voice else None
+    return TranscriptCue(identifier, parse_timestamp(timing.group(1)), parse_timestamp(timing.group(2)),
+                         speaker, _TAG_RE.sub('', text).strip())
+
+
+def iter_vtt_cues(chunks: Iterable[bytes]) -> Iterator[TranscriptCue]:
+    """Parse cues from WebVTT content as it is downloaded."""
+    block = []
+    header = True
+    for line in _iter_lines(chunks):
+        if line.strip():
+            block.append(line)
+            continue
+        if block:
+            if header:
+                # the WEBVTT header block
+                header = False
+            elif not block[0].startswith(('NOTE', 'STYLE', 'REGION')):
+                cue = _make_cue(block)
+                if cue is not None:
+                    yield cue
+            block = []
+    if block and not header and not block[0].startswith(('NOTE', 'STYLE', 'REGION')):
+        cue = _make_cue(block)
+        if cue is not None:
+            yield cue
+
+
+class TranscriptExporter(object):
+    """
+    Download the transcripts of many meetings concurrently and write one
+    normalized record per cue to `sink`.
+
+    `online_meetings` is an `OnlineMeetingServicesFactory`, e.g.
+    `client.users(organizer_id).onlineMeetings`. `sink` is called with a dict
+    per cue, from one thread at a time. The cues of a transcript are only
+    written once it is fully downloaded, a failed transcript writes none.
+    """
+    def __init__(self, online_meetings, sink: Callable[[dict], None], max_workers: int = 4):
+        self.online_meetings = online_meetings
+        self.sink = sink
+        self.max_workers = max_workers
+        self._sink_lock = threading.Lock()
+
+    def export(self, meeting_ids: Iterable[str]) -> Dict[Tuple[str, str], int]:
+        """
+        Returns the number of exported cues by (meeting id, transcript id);
+        failed transcripts, including those failing halfway, are logged and
+        left out.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            listed = executor.map(self._list_transcripts, meeting_ids)
+            jobs = [(meeting_id, transcript) for meeting_id, transcripts in listed for transcript in transcripts]
+            counts = executor.map(lambda job: self._export_transcript(*job), jobs)
+            return {(meeting_id, transcript['id']): count
+                    for (meeting_id, transcript), count in zip(jobs, counts) if count is not None}
+
+    def _list_transcripts(self, meeting_id):
+        service = self.online_meetings(meeting_id).transcripts
+        try:
+            return meeting_id, [t for page in service.iter_pages(*service.list()) for t in page.get('value', [])]
+        except (Office365ClientError, Office365ServerError) as e:
+            logger.error('Unable to list transcripts of meeting %s: %s', meeting_id, e)
+            return meeting_id, []
+
+    def _export_transcript(self, meeting_id, transcript):
+        from requests import RequestException
+
+        service = self.online_meetings(meeting_id).transcripts
+        records = []
+        try:
+            for cue in service.iter_cues(transcript['id']):
+                record = cue.as_dict()
+                record.update({
+                    'meetingId': meeting_id,
+                    'transcriptId': transcript['id'],
+                    'createdDateTime': transcript.get('createdDateTime'),
+                    'index': len(records),
+                })
+                records.append(record)
+        except (Office365ClientError, Office365ServerError, RequestException) as e:
+            # e.g. a connection reset while streaming, the cues already parsed are dropped
+            logger.error('Unable to export transcript %s of meeting %s: %s', transcript['id'], meeting_id, e)
+            return None
+        with self._sink_lock:
+            for record in records:
+                self.sink(record)
+        return len(records)
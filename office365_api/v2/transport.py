@@ -0,0 +1,172 @@
+"""
+A lighter alternative to `requests.Session` for sending Graph requests.
+
+    client = MicrosoftGraphClient(Urllib3Transport(), token_provider=provider)
+
+`Urllib3Transport.request` accepts the arguments the services pass to
+`session.request` and sends them straight to an urllib3 pool, skipping the
+hooks, cookie handling, header merging and response wrapping of requests.
+Error statuses raise `requests.HTTPError` and connection failures the
+matching `requests` exceptions, so services map and retry them exactly as
+with a session. Authentication has to come from the client `token_provider`,
+the transport has no auth hooks.
+"""
+import contextlib
+import json
+import logging
+from typing import Iterator
+
+from .consts import STREAM_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+# request() has a `json` argument, like requests
+_json_dumps = json.dumps
+
+
+@contextlib.contextmanager
+def _translated_errors(reading_body=False):
+    """Raise urllib3 failures as the requests exceptions the services handle."""
+    import urllib3.exceptions as uex
+    try:
+        yield
+    except uex.HTTPError as e:
+        import requests.exceptions as rex
+        if isinstance(e, uex.MaxRetryError) and isinstance(e.reason, uex.ResponseError):
+            raise rex.TooManyRedirects(e) from e
+        if isinstance(e, uex.MaxRetryError) and e.reason is not None:
+            e = e.reason
+        if isinstance(e, uex.ReadTimeoutError):
+            raise rex.ReadTimeout(e) from e
+        if isinstance(e, uex.ConnectTimeoutError) and not isinstance(e, uex.NewConnectionError):
+            raise rex.ConnectTimeout(e) from e
+        if reading_body and isinstance(e, (uex.ProtocolError, uex.DecodeError)):
+            raise rex.ChunkedEncodingError(e) from e
+        raise rex.ConnectionError(e) from e
+
+
+class Urllib3Response(object):
+    """The parts of `requests.Response` used by the services."""
+    def __init__(self, raw, url, stream):
+        self.raw = raw
+        self.url = url
+        self.status_code = raw.status
+        self.headers = raw.headers
+        self.reason = raw.reason
+        self._content = None if stream else raw.data
+
+    @property
+    def content(self) -> bytes:
+        if self._content is None:
+            with _translated_errors(reading_body=True):
+                self._content = self.raw.read()
+        return self._content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        from requests.exceptions import JSONDecodeError
+        try:
+            return json.loads(self.content)
+        except ValueError as e:
+            raise JSONDecodeError(str(e), self.text, 0) from e
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def raise_for_status(self):
+        if not self.ok:
+            from requests import HTTPError
+            kind = 'Client' if self.status_code < 500 else 'Server'
+            raise HTTPError('{} {} Error: {} for url: {}'.format(self.status_code, kind, self.reason, self.url),
+                            response=self)
+
+    def iter_content(self, chunk_size: int = STREAM_CHUNK_SIZE, buffer=None) -> Iterator[bytes]:
+        """
+        Chunks of the body. With a `buffer` (e.g. a `bytearray` kept by the
+        caller) chunks are memoryviews into it instead of new bytes objects,
+        only valid until the next chunk is read.
+        """
+        if self._content is not None:
+            for i in range(0, len(self._content), chunk_size):
+                yield self._content[i:i + chunk_size]
+            return
+        with _translated_errors(reading_body=True):
+            if buffer is None:
+                yield from self.raw.stream(chunk_size)
+                return
+            view = memoryview(buffer)
+            while True:
+                size = self.raw.readinto(view)
+                if not size:
+                    return
+                yield view[:size]
+
+    def close(self):
+        if not self.raw.closed:
+            # the rest of the body was not read, the connection can't be reused
+            self.raw.close()
+        self.raw.release_conn()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class Urllib3Transport(object):
+    """
+    Session-like transport over an urllib3 `PoolManager`. Responses with an
+    error status raise `requests.HTTPError` unless `raise_for_status` is
+    False. `timeout` is in seconds, as a number or a (connect, read) tuple.
+    """
+    def __init__(self, headers: dict | None = None, timeout=None, raise_for_status: bool = True,
+                 num_pools: int = 10, maxsize: int = 16, max_redirects: int = 30,
+                 **pool_options):
+        import urllib3
+        self.headers = dict(headers or {})
+        self.raise_for_status = raise_for_status
+        if isinstance(timeout, tuple):
+            timeout = urllib3.Timeout(connect=timeout[0], read=timeout[1])
+        self.timeout = timeout
+        # no retries, the services retry themselves, but redirects are followed like requests does,
+        # e.g. for /content downloads
+        retries = urllib3.Retry(total=None, connect=0, read=0, status=0, other=0, redirect=max_redirects,
+                                raise_on_redirect=True)
+        self.pool = urllib3.PoolManager(num_pools=num_pools, maxsize=maxsize, retries=retries, **pool_options)
+
+    def request(self, method, url, data=None, json=None, headers=None, stream=False, **kwargs):
+        headers = {**self.headers, **headers} if headers else dict(self.headers)
+        if json is not None:
+            data = _json_dumps(json)
+            headers.setdefault('Content-Type', 'application/json')
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        options = {}
+        timeout = kwargs.get('timeout', self.timeout)
+        if timeout is not None:
+            options['timeout'] = timeout
+        with _translated_errors():
+            raw = self.pool.urlopen(method, url, body=data, headers=headers, preload_content=not stream,
+                                    decode_content=True, **options)
+        resp = Urllib3Response(raw, url, stream)
+        if self.raise_for_status and not resp.ok:
+            if stream:
+                # the error body is read for map_http_error, the connection goes back to the pool
+                resp.content
+                resp.close()
+            resp.raise_for_status()
+        return resp
+
+    def close(self):
+        self.pool.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -6,4 +6,13 @@ setup(name='office365-rest-client',
       description='Python api wrapper for Office365 API v3.5.2',
       author='SugarCRM',
       packages=find_packages(),
+      extras_require={
+          # NotificationDecryptor, for rich change notifications
+          'notifications': ['cryptography'],
+      },
+      entry_points={
+          'console_scripts': [
+              'office365-sync-runner=office365_api.v2.runner:main',
+          ],
+      },
       zip_safe=False)